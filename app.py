@@ -1,8 +1,20 @@
 import streamlit as st
 from validators.hvb_validator_enhanced import HVBValidator
 from validators.coba_validator_enhanced import CoBaValidator
+from validators.schema_registry import default_registry, warm_up
+from validators.delta_cache import DeltaCache
+from validators.archive import ArchiveLimitExceeded, is_archive, read_member
 import utils
-import pandas as pd
+import reports
+import repair
+import history
+from jobs import ArchiveValidationJob, ValidationJob
+from tx_index import SORT_COLUMNS, TransactionIndex, iter_batch_rows
+import hashlib
+import io
+import os
+import time
+import zipfile
 
 # --- ULTRA-READABLE CSS ---
 READABLE_STYLE = """
@@ -110,7 +122,32 @@ st.set_page_config(
 )
 st.markdown(READABLE_STYLE, unsafe_allow_html=True)
 
-XSD_PATH = "schemas/pain.001.001.09.xsd"
+# Schema-Auswahl pro Datei über den Namespace (schemas/*.xsd)
+schema_registry = default_registry()
+
+
+@st.cache_resource
+def get_history_store():
+    """Verlauf einmal pro Prozess öffnen (Aufbewahrung regelt der Store selbst)"""
+    return history.HistoryStore()
+
+
+history_store = get_history_store()
+
+
+@st.cache_resource
+def get_delta_cache():
+    """Regel- und Extraktionsergebnisse pro Sammler (für korrigierte Re-Uploads)"""
+    return DeltaCache(max_entries=20000)
+
+
+@st.cache_resource
+def start_warm_up():
+    """Standard-Schema einmal pro Prozess im Hintergrund kompilieren (weitere Versionen bei Bedarf)"""
+    return warm_up(schema_registry.default.xsd_path, background=True)
+
+
+start_warm_up()
 
 # --- SIDEBAR ---
 with st.sidebar:
@@ -122,27 +159,157 @@ with st.sidebar:
     st.markdown("### ⚙️ Einstellungen")
     bank = st.selectbox("Hausbank Profil", ["HypoVereinsbank", "Commerzbank"])
     
-    if bank == "HypoVereinsbank":
-        validator = HVBValidator(XSD_PATH)
-    else:
-        validator = CoBaValidator(XSD_PATH)
+    validator_cls = HVBValidator if bank == "HypoVereinsbank" else CoBaValidator
+    validator = validator_cls()
         
     st.divider()
+    
+    # Verlauf der letzten Läufe
+    with st.expander("🕘 Verlauf", expanded=False):
+        term = st.text_input("Suche (Datei, Profil, Hash)", key="history_search")
+        runs = history_store.search(term) if term else history_store.recent(limit=15)
+        if runs:
+            for run in runs:
+                status_icon = "✅" if run['valid'] else "❌"
+                st.caption(
+                    f"{status_icon} **{run['file_name']}** · {run['profile']}  \n"
+                    f"{time.strftime('%d.%m.%Y %H:%M', time.localtime(run['created_at']))} · "
+                    f"{run['error_count']} Fehler · {run['warning_count']} Warnungen · {run['duration_ms']:.0f} ms"
+                )
+        else:
+            st.caption("Keine Einträge")
+    
+    st.divider()
+    st.caption(f"📑 Versionen: {', '.join(schema_registry.messages())}")
     st.caption("📌 **ISO 20022 Payment Validator**")
     st.caption("v2.8 | Enhanced Validation | KTC")
 
-# --- HEADER ---
-st.title("📋 ISO 20022 Payment Validator")
-st.caption(f"**KTC Treasury Consulting** | Aktives Profil: **{bank}**")
 
-uploaded_file = st.file_uploader("📂 Zahlungsdatei (pain.001.001.09 XML)", type=["xml"])
+def get_payment_view(digest, xml_bytes, data=None):
+    """
+    Sammler-Übersicht (ohne Transaktionen) und Transaktions-Index einmal pro
+    Datei. Reruns (Blättern, Filtern) extrahieren nichts neu; gehalten wird
+    nur die aktuelle Datei. (None, None), wenn die Datei nicht lesbar ist.
+    """
+    cached = st.session_state.get('payment_view')
+    if cached is not None and cached[0] == digest:
+        return cached[1], cached[2]
+    if cached is not None:
+        cached[2].close()
+        del st.session_state['payment_view']
+    
+    if data is None:
+        data = utils.parse_payment_data(xml_bytes)
+    if not data:
+        return None, None
+    # Kopien: die Sammler können aus dem Delta-Cache stammen
+    batches = [dict({k: v for k, v in b.items() if k != 'txs'}, tx_count=len(b['txs'])) for b in data['batches']]
+    index = TransactionIndex(iter_batch_rows(data))
+    st.session_state['payment_view'] = (digest, batches, index)
+    return batches, index
 
-if uploaded_file:
-    xml_bytes = uploaded_file.read()
+
+def render_transaction_browser(index, batches):
+    """Such-, Filter- und Blätteransicht; an den Browser geht nur die aktuelle Seite"""
+    import pandas as pd
+    
+    st.markdown(f"### 💸 Transaktionen ({len(index)})")
+    
+    f1, f2, f3 = st.columns(3)
+    cdtr = f1.text_input("Empfänger enthält", key="tx_f_cdtr")
+    iban = f2.text_input("IBAN beginnt mit", key="tx_f_iban")
+    e2e = f3.text_input("E2E-Referenz beginnt mit", key="tx_f_e2e")
+    
+    f4, f5, f6 = st.columns(3)
+    batch_idx = f4.selectbox(
+        "Sammler",
+        [None] + list(range(1, len(batches) + 1)),
+        format_func=lambda i: "Alle" if i is None else f"{i}: {batches[i - 1]['id']}",
+        key="tx_f_batch"
+    )
+    min_amt = f5.number_input("Betrag von", min_value=0.0, value=None, step=100.0, format="%.2f", key="tx_f_min")
+    max_amt = f6.number_input("Betrag bis", min_value=0.0, value=None, step=100.0, format="%.2f", key="tx_f_max")
+    
+    s1, s2, s3, s4 = st.columns([3, 2, 2, 2])
+    sort = s1.selectbox("Sortierung", list(SORT_COLUMNS), key="tx_sort")
+    descending = s2.toggle("Absteigend", key="tx_desc")
+    page_size = s3.selectbox("Zeilen pro Seite", [25, 50, 100, 250], index=1, key="tx_page_size")
+    page = s4.number_input("Seite", min_value=1, value=1, step=1, key="tx_page")
+    
+    filters = dict(cdtr=cdtr, iban=iban, e2e=e2e, min_amt=min_amt, max_amt=max_amt, batch_idx=batch_idx)
+    rows, total = index.query(sort=sort, descending=descending, page=page, page_size=page_size, **filters)
+    pages = max(1, -(-total // page_size))
+    if page > pages:
+        page = pages
+        rows, total = index.query(sort=sort, descending=descending, page=page, page_size=page_size, **filters)
+    
+    st.caption(f"{total} Treffer · Seite {page} von {pages}")
     
-    validator.validate(xml_bytes)
+    if not rows:
+        st.info("ℹ️ Keine Transaktionen für diese Filter")
+        return
+    
+    tx_list = []
+    for tx in rows:
+        tx_list.append({
+            "#": tx['pos'],
+            "Sammler": tx['batch_idx'],
+            "Empfänger": tx['cdtr'][:35],
+            "IBAN": tx['cdtr_iban'],
+            "Betrag": f"{tx['amt']} {tx['ccy']}",
+            "Referenz (E2E)": tx['e2e'][:20],
+            "Verwendungszweck": tx['rmt'][:50] + "..." if len(tx['rmt']) > 50 else tx['rmt']
+        })
+    st.dataframe(pd.DataFrame(tx_list), use_container_width=True, hide_index=True, height=min(400, len(tx_list) * 35 + 50))
+    
+    # Detail-Ansicht (Auswahl nur über die aktuelle Seite)
+    with st.expander("🔍 Transaktion im Detail anzeigen", expanded=False):
+        by_pos = {tx['pos']: tx for tx in rows}
+        sel = st.selectbox(
+            "Transaktion wählen:",
+            list(by_pos),
+            format_func=lambda pos: f"#{pos}: {by_pos[pos]['cdtr']} - {by_pos[pos]['amt']} {by_pos[pos]['ccy']}",
+            key="tx_sel"
+        )
+        tx = by_pos[sel]
+        
+        d1, d2 = st.columns(2)
+        with d1:
+            st.text_input("Empfänger", tx['cdtr'], key=f"t_cdtr_{sel}")
+            st.text_input("IBAN", tx['cdtr_iban'], key=f"t_iban_{sel}")
+            st.text_input("Betrag", f"{tx['amt']} {tx['ccy']}", key=f"t_amt_{sel}")
+        
+        with d2:
+            st.text_input("E2E Referenz", tx['e2e'], key=f"t_e2e_{sel}")
+            if tx.get('cdtr_bic') and tx['cdtr_bic'] != '-':
+                st.text_input("BIC", tx['cdtr_bic'], key=f"t_bic_{sel}")
+        
+        st.text_area("Verwendungszweck", tx['rmt'], height=70, key=f"t_rmt_{sel}")
+
+
+def get_export(digest, kind, fmt, build=None):
+    """
+    Export einmal pro Datei, Profil und Format erzeugen statt bei jedem
+    Rerun. build(buf) schreibt den Export; ohne build wird nur nachgesehen
+    (None = noch nicht erstellt). Gehalten werden nur Exporte der aktuellen
+    Datei.
+    """
+    exports = st.session_state.setdefault('exports', {})
+    key = (digest, bank, kind, fmt)
+    if key not in exports and build is not None:
+        for old in [k for k in exports if k[0] != digest]:
+            del exports[old]
+        buf = io.BytesIO()
+        build(buf)
+        exports[key] = buf.getvalue()
+    return exports.get(key)
+
+
+def render_results(validator, xml_bytes, data=None):
+    """Rendert die Ergebnis-Tabs für eine bereits validierte Datei"""
     profile_name, profile_desc = validator.get_profile_info()
-    data = utils.parse_payment_data(xml_bytes)
+    digest = history.file_hash(xml_bytes)
+    batches, tx_index = get_payment_view(digest, xml_bytes, data)
     
     checks_summary = validator.get_checks_summary()
 
@@ -214,6 +381,23 @@ if uploaded_file:
         
         st.markdown("---")
         
+        # Level 4: Compliance (Sperrliste)
+        st.markdown("### 🛡️ Level 4: Compliance (Sperrliste)")
+        
+        if validator.watchlist is not None:
+            for check in checks_summary['compliance']:
+                status_icon = "✅" if check['status'] is True else "❌" if check['status'] is False else "⚪"
+                status_class = "check-ok" if check['status'] is True else "check-fail" if check['status'] is False else "check-skip"
+                
+                col_icon, col_name = st.columns([1, 9])
+                col_icon.markdown(f'<span class="{status_class}">{status_icon}</span>', unsafe_allow_html=True)
+                col_name.markdown(f"**{check['name']}**")
+            st.caption(f"{len(validator.watchlist)} Einträge aus {os.path.basename(validator.watchlist.source)}")
+        else:
+            st.info("ℹ️ Keine Sperrliste hinterlegt (watchlist.txt oder ISO_VALIDATOR_WATCHLIST)")
+        
+        st.markdown("---")
+        
         # Fehler-Details
         if validator.errors:
             st.markdown("### 📋 Fehler-Details")
@@ -238,75 +422,114 @@ if uploaded_file:
                             st.code(f"<{e['tag']}>")
         else:
             st.success("🎉 **Keine Fehler gefunden - Datei ist vollständig korrekt!**")
-
-    # ========== TAB 2: ZAHLUNGEN ==========
-    with tab_payment:
-        if data:
-            for batch_idx, b in enumerate(data['batches'], 1):
-                
-                st.markdown(f"### 📦 Sammler {batch_idx}")
-                
-                # Header Info
-                c1, c2, c3, c4, c5 = st.columns(5)
-                c1.metric("Transaktionen", len(b['txs']))
-                c2.metric("Summe", f"{b.get('ctrl_sum', '-')}")
-                c3.metric("Währung", b.get('ccy', 'EUR'))
-                c4.metric("Datum", b['date'])
-                c5.metric("Zahlweg", "SEPA CT")
-                
-                # Auftraggeber
-                st.markdown("**👤 Auftraggeber**")
-                col1, col2, col3 = st.columns([2, 2, 1])
-                col1.text_input("Name", b['dbtr'], key=f"d_name_{batch_idx}", label_visibility="collapsed")
-                col2.text_input("IBAN", b['iban'], key=f"d_iban_{batch_idx}", label_visibility="collapsed")
-                col3.text_input("Ref", b['id'][:15], key=f"d_ref_{batch_idx}", label_visibility="collapsed")
-                
-                st.markdown("---")
+        
+        st.markdown("---")
+        
+        # Export für Prüfer / CI
+        st.markdown("### 📥 Export")
+        col_fmt, col_report, col_payments = st.columns([2, 3, 3])
+        fmt = col_fmt.selectbox("Format", list(reports.FORMATS), format_func=str.upper, key="export_fmt")
+        mime, ext = reports.FORMATS[fmt]
+        
+        report_bytes = get_export(
+            digest, 'report', fmt,
+            lambda buf: reports.write_validation_report(fmt, buf, validator.checks, validator.errors)
+        )
+        col_report.download_button(
+            "📄 Validierungsbericht",
+            report_bytes,
+            file_name=f"validierung{ext}",
+            mime=mime,
+            use_container_width=True
+        )
+        
+        if fmt != 'junit':
+            # Zahlungsexport erst auf Anforderung (bei großen Dateien teuer)
+            payments_bytes = get_export(digest, 'payments', fmt)
+            if payments_bytes is None and col_payments.button(
+                "💳 Zahlungsdaten erstellen", key="payments_btn", use_container_width=True
+            ):
+                payments_bytes = get_export(
+                    digest, 'payments', fmt,
+                    lambda buf: reports.write_payment_export(fmt, buf, utils.iter_transactions(xml_bytes))
+                )
+            if payments_bytes is not None:
+                col_payments.download_button(
+                    "💳 Zahlungsdaten",
+                    payments_bytes,
+                    file_name=f"zahlungen{ext}",
+                    mime=mime,
+                    use_container_width=True
+                )
+        
+        # Automatische Korrektur (Zeichensatz, Slashes, IBAN/BIC, Kontrollsummen)
+        st.markdown("### 🛠️ Reparieren")
+        repaired = st.session_state.get('repair')
+        if repaired is not None and repaired[0] != digest:
+            repaired = None
+        if repaired is None and st.button("🛠️ Korrigierte Datei erstellen", key="repair_btn"):
+            fixed_buf = io.BytesIO()
+            try:
+                changes = repair.repair(xml_bytes, fixed_buf)
+                repaired = (digest, fixed_buf.getvalue(), changes)
+                st.session_state['repair'] = repaired
+            except Exception as e:
+                st.error(f"❌ Reparatur nicht möglich: {e}")
+        
+        if repaired is not None:
+            _, fixed_bytes, changes = repaired
+            if changes:
+                import pandas as pd
                 
-                # Transaktionen
-                st.markdown("**💸 Transaktionen**")
+                st.caption(f"{len(changes)} Änderungen · Korrigierte Datei bitte erneut hochladen und prüfen")
+                st.dataframe(pd.DataFrame(changes), use_container_width=True, hide_index=True, height=min(300, len(changes) * 35 + 50))
                 
-                if b['txs']:
-                    tx_list = []
-                    for idx, tx in enumerate(b['txs'], 1):
-                        tx_list.append({
-                            "#": idx,
-                            "Empfänger": tx['cdtr'][:35],
-                            "IBAN": tx['cdtr_iban'],
-                            "Betrag": f"{tx['amt']} {tx['ccy']}",
-                            "Referenz (E2E)": tx['e2e'][:20],
-                            "Verwendungszweck": tx['rmt'][:50] + "..." if len(tx['rmt']) > 50 else tx['rmt']
-                        })
-                    
-                    df = pd.DataFrame(tx_list)
-                    st.dataframe(df, use_container_width=True, hide_index=True, height=min(400, len(tx_list) * 45 + 50))
-                    
-                    # Detail-Ansicht
-                    with st.expander("🔍 Transaktion im Detail anzeigen", expanded=False):
-                        sel = st.selectbox(
-                            "Transaktion wählen:",
-                            range(1, len(b['txs']) + 1),
-                            format_func=lambda x: f"#{x}: {b['txs'][x-1]['cdtr']} - {b['txs'][x-1]['amt']} {b['txs'][x-1]['ccy']}",
-                            key=f"sel_{batch_idx}"
-                        )
-                        
-                        tx = b['txs'][sel - 1]
-                        
-                        d1, d2 = st.columns(2)
-                        with d1:
-                            st.text_input("Empfänger", tx['cdtr'], key=f"t_cdtr_{batch_idx}_{sel}")
-                            st.text_input("IBAN", tx['cdtr_iban'], key=f"t_iban_{batch_idx}_{sel}")
-                            st.text_input("Betrag", f"{tx['amt']} {tx['ccy']}", key=f"t_amt_{batch_idx}_{sel}")
-                        
-                        with d2:
-                            st.text_input("E2E Referenz", tx['e2e'], key=f"t_e2e_{batch_idx}_{sel}")
-                            if tx.get('cdtr_bic') and tx['cdtr_bic'] != '-':
-                                st.text_input("BIC", tx['cdtr_bic'], key=f"t_bic_{batch_idx}_{sel}")
-                        
-                        st.text_area("Verwendungszweck", tx['rmt'], height=70, key=f"t_rmt_{batch_idx}_{sel}")
+                log_fmt = fmt if fmt != 'junit' else 'csv'
+                log_mime, log_ext = reports.FORMATS[log_fmt]
+                log_buf = io.BytesIO()
+                repair.write_change_log(log_fmt, log_buf, changes)
                 
-                if batch_idx < len(data['batches']):
-                    st.markdown("---")
+                col_fixed, col_log = st.columns(2)
+                col_fixed.download_button(
+                    "📄 Korrigierte Datei",
+                    fixed_bytes,
+                    file_name="repariert.xml",
+                    mime="application/xml",
+                    use_container_width=True
+                )
+                col_log.download_button(
+                    "📋 Änderungsprotokoll",
+                    log_buf.getvalue(),
+                    file_name=f"aenderungen{log_ext}",
+                    mime=log_mime,
+                    use_container_width=True
+                )
+            else:
+                st.info("ℹ️ Keine automatisch behebbaren Findings")
+
+    # ========== TAB 2: ZAHLUNGEN ==========
+    with tab_payment:
+        if batches is not None:
+            import pandas as pd
+            
+            # Sammler-Übersicht (eine Zeile pro PmtInf)
+            st.markdown(f"### 📦 Sammler ({len(batches)})")
+            batch_rows = []
+            for batch_idx, b in enumerate(batches, 1):
+                batch_rows.append({
+                    "#": batch_idx,
+                    "Referenz": b['id'],
+                    "Datum": b['date'],
+                    "Auftraggeber": b['dbtr'],
+                    "IBAN": b['iban'],
+                    "Transaktionen": b['tx_count'],
+                    "Summe": b.get('ctrl_sum', '-'),
+                    "Währung": b.get('ccy', 'EUR'),
+                })
+            st.dataframe(pd.DataFrame(batch_rows), use_container_width=True, hide_index=True, height=min(400, len(batch_rows) * 35 + 50))
+            
+            st.markdown("---")
+            render_transaction_browser(tx_index, batches)
         else:
             st.error("❌ Datei konnte nicht geparst werden.")
 
@@ -321,5 +544,190 @@ if uploaded_file:
         if validator.errors:
             st.caption("🔴 Fehler sind rot markiert.")
         
-        html_view = utils.render_highlighted_xml(xml_bytes, validator.errors)
-        st.markdown(html_view, unsafe_allow_html=True)
+        # Markierte Ansicht einmal pro Datei und Profil (nicht bei jedem Rerun)
+        view_key = (digest, bank, validator.ruleset_version)
+        cached = st.session_state.get('xml_view')
+        if cached is None or cached[0] != view_key:
+            cached = (view_key, utils.render_highlighted_xml(xml_bytes, validator.errors))
+            st.session_state['xml_view'] = cached
+        st.markdown(cached[1], unsafe_allow_html=True)
+
+
+
+def cancel_running_job():
+    """Bricht eine laufende Hintergrund-Validierung ab (neue Datei / neues Profil)"""
+    job = st.session_state.pop('validation_job', None)
+    if job is not None and not job.finished:
+        job.cancel()
+
+
+def run_validation_job(job_key, file_bytes):
+    """
+    Startet die Validierung im Hintergrund bzw. verfolgt den laufenden Job.
+    Gibt den fertigen Job zurück; solange er läuft, wird der Fortschritt
+    samt Teilergebnissen angezeigt und die Seite neu geladen.
+    """
+    job = st.session_state.get('validation_job')
+    if job is None or job.key != job_key:
+        cancel_running_job()
+        job = ValidationJob(validator_cls(), file_bytes, key=job_key, delta_cache=get_delta_cache()).start()
+        st.session_state['validation_job'] = job
+    
+    if job.finished:
+        return job
+    
+    st.progress(job.fraction(), text=f"⏳ {job.label()}")
+    
+    # Teilergebnisse: bereits abgeschlossene Prüfungen
+    checks = list(job.validator.checks.values())
+    done = [c for c in checks if c['status'] is not None]
+    st.caption(f"{len(done)} von {len(checks)} Prüfungen abgeschlossen · {len(job.validator.errors)} Findings bisher")
+    for check in done:
+        st.markdown(f"{'✅' if check['status'] else '❌'} {check['name']}")
+    
+    if st.button("⏹️ Validierung abbrechen"):
+        job.cancel()
+    
+    time.sleep(0.3)
+    st.rerun()
+
+
+def run_archive_job(job_key, file_name, file_bytes):
+    """
+    Wie run_validation_job für Archive: die Member werden im Hintergrund
+    nacheinander geprüft, solange wird der Fortschritt angezeigt.
+    """
+    job = st.session_state.get('validation_job')
+    if job is None or job.key != job_key:
+        cancel_running_job()
+        job = ArchiveValidationJob(validator_cls, file_name, file_bytes, key=job_key).start()
+        st.session_state['validation_job'] = job
+    
+    if job.finished:
+        return job
+    
+    st.progress(job.fraction(), text=f"⏳ {job.label()}")
+    done, total = job.member_progress
+    st.caption(f"{done} von {total} Dateien geprüft · {job.invalid_count} fehlerhaft bisher")
+    
+    if st.button("⏹️ Validierung abbrechen"):
+        job.cancel()
+    
+    time.sleep(0.3)
+    st.rerun()
+
+
+def render_archive(file_name, file_bytes):
+    """Übersicht über alle Dateien eines ZIP/GZ-Archivs mit Drill-Down"""
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    state_key = f"archive_{bank}_{digest}"
+    
+    if state_key in st.session_state:
+        cancel_running_job()
+    else:
+        job = run_archive_job(('archive', digest, bank), file_name, file_bytes)
+        if job.state == 'cancelled':
+            st.warning("⏹️ Validierung abgebrochen.")
+            if st.button("🔄 Neu starten"):
+                cancel_running_job()
+                st.rerun()
+            return
+        if job.state == 'failed':
+            if isinstance(job.error, ArchiveLimitExceeded):
+                st.error(f"❌ Archiv zu groß: {job.error}")
+            elif isinstance(job.error, (zipfile.BadZipFile, OSError, EOFError)):
+                st.error(f"❌ Archiv konnte nicht gelesen werden: {job.error}")
+            else:
+                st.error(f"❌ Validierung fehlgeschlagen: {job.error}")
+            return
+        st.session_state[state_key] = job.results
+        cancel_running_job()
+    
+    results = st.session_state[state_key]
+    if not results:
+        st.warning("⚠️ Keine XML-Dateien im Archiv gefunden.")
+        return
+    
+    st.markdown("## 🗂️ Archiv-Übersicht")
+    valid_count = len([r for r in results if r['valid']])
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Dateien", len(results))
+    col2.metric("✅ Gültig", valid_count)
+    col3.metric("❌ Fehlerhaft", len(results) - valid_count)
+    
+    import pandas as pd
+    
+    rows = []
+    for r in results:
+        errs = r['validator'].errors
+        rows.append({
+            "Datei": r['member'],
+            "Status": "✅" if r['valid'] else "❌",
+            "Fehler": len([e for e in errs if e['level'] in ['CRITICAL', 'ERROR']]),
+            "Warnungen": len([e for e in errs if e['level'] == 'WARNING']),
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True, height=min(400, len(rows) * 35 + 50))
+    
+    sel = st.selectbox(
+        "🔍 Datei im Detail anzeigen:",
+        range(len(results)),
+        format_func=lambda i: f"{'✅' if results[i]['valid'] else '❌'} {results[i]['member']}",
+        key=f"sel_member_{state_key}"
+    )
+    st.markdown("---")
+    
+    result = results[sel]
+    try:
+        member_bytes = read_member(file_name, file_bytes, result['member'])
+    except (ArchiveLimitExceeded, zipfile.BadZipFile, OSError, EOFError):
+        # Member ließ sich schon bei der Prüfung nicht entpacken - nur die Meldung zeigen
+        for e in result['validator'].errors:
+            st.error(f"❌ {e['title']}: {e['msg']}")
+        return
+    render_results(result['validator'], member_bytes)
+
+
+# --- HEADER ---
+st.title("📋 ISO 20022 Payment Validator")
+st.caption(f"**KTC Treasury Consulting** | Aktives Profil: **{bank}**")
+
+uploaded_file = st.file_uploader("📂 Zahlungsdatei (pain.001 XML oder ZIP/GZ-Archiv)", type=["xml", "zip", "gz"])
+
+if uploaded_file:
+    file_bytes = uploaded_file.read()
+    
+    if is_archive(uploaded_file.name):
+        render_archive(uploaded_file.name, file_bytes)
+    else:
+        digest = history.file_hash(file_bytes)
+        record = history_store.lookup(digest, bank, validator.ruleset_version)
+        
+        if record:
+            cancel_running_job()
+            history.restore(validator, record)
+            st.info(
+                f"🕘 Ergebnis aus dem Verlauf vom "
+                f"{time.strftime('%d.%m.%Y %H:%M', time.localtime(record['created_at']))} "
+                f"(Regelwerk {record['ruleset_version']})"
+            )
+            render_results(validator, file_bytes)
+        else:
+            job = run_validation_job((digest, bank), file_bytes)
+            
+            if job.state == 'cancelled':
+                st.warning("⏹️ Validierung abgebrochen.")
+                if st.button("🔄 Neu starten"):
+                    cancel_running_job()
+                    st.rerun()
+            elif job.state == 'failed':
+                st.error(f"❌ Validierung fehlgeschlagen: {job.error}")
+            else:
+                history_store.save(
+                    digest, uploaded_file.name, bank, job.validator.ruleset_version,
+                    job.duration_ms, job.valid,
+                    {k: c['status'] for k, c in job.validator.checks.items()}, job.validator.errors
+                )
+                cancel_running_job()
+                render_results(job.validator, file_bytes, job.data)
+else:
+    cancel_running_job()
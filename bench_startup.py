@@ -0,0 +1,158 @@
+"""
+Kaltstart-Benchmark für Validatoren und App-Module.
+
+Misst in einem frischen Interpreter
+  1. die Import-Zeit der Module, die app.py auf oberster Ebene importiert
+     (direkt aus app.py gelesen, ohne Streamlit selbst),
+  2. die Zeit bis zur ersten fertigen Validierung einer gültigen Datei
+     (inkl. Aufbau des XSD-Schnelltests, ohne xmlschema),
+  3. die erste Validierung einer Datei, die der Schnelltest ablehnt - hier
+     wird xmlschema geladen und das Schema kompiliert,
+und prüft, dass schwere Abhängigkeiten (pandas, xmlschema, minidom) beim
+Import und im Schnelltest-Pfad noch nicht geladen sind.
+
+Aufruf:  python bench_startup.py [--runs 3]
+Exit-Code 1, wenn ein Budget überschritten wird.
+"""
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+# Budgets in Sekunden (Median über alle Läufe)
+IMPORT_BUDGET_S = 0.25
+FIRST_VALIDATION_BUDGET_S = 0.25
+XSD_COMPILE_BUDGET_S = 1.5
+
+# Nicht Teil der Messung (Laufzeit der App, nicht unserer Module)
+EXCLUDED_MODULES = {'streamlit'}
+
+# Module, die erst bei Bedarf geladen werden dürfen
+LAZY_MODULES = ['pandas', 'xmlschema', 'xml.dom.minidom']
+
+SAMPLE_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:pain.001.001.09"><CstmrCdtTrfInitn>
+<GrpHdr><MsgId>BENCH1</MsgId><CreDtTm>2025-01-01T10:00:00</CreDtTm><NbOfTxs>1</NbOfTxs><CtrlSum>10.00</CtrlSum><InitgPty><Nm>KTC GmbH</Nm></InitgPty></GrpHdr>
+<PmtInf><PmtInfId>PMT1</PmtInfId><PmtMtd>TRF</PmtMtd><NbOfTxs>1</NbOfTxs><CtrlSum>10.00</CtrlSum>
+<PmtTpInf><SvcLvl><Cd>SEPA</Cd></SvcLvl></PmtTpInf><ReqdExctnDt><Dt>2025-01-02</Dt></ReqdExctnDt>
+<Dbtr><Nm>KTC GmbH</Nm></Dbtr><DbtrAcct><Id><IBAN>DE89370400440532013000</IBAN></Id></DbtrAcct>
+<DbtrAgt><FinInstnId><BICFI>COBADEFFXXX</BICFI></FinInstnId></DbtrAgt><ChrgBr>SLEV</ChrgBr>
+<CdtTrfTxInf><PmtId><EndToEndId>E2E1</EndToEndId></PmtId><Amt><InstdAmt Ccy="EUR">10.00</InstdAmt></Amt>
+<Cdtr><Nm>Max Mustermann</Nm></Cdtr><CdtrAcct><Id><IBAN>DE02120300000000202051</IBAN></Id></CdtrAcct>
+<RmtInf><Ustrd>Rechnung 1</Ustrd></RmtInf></CdtTrfTxInf></PmtInf>
+</CstmrCdtTrfInitn></Document>"""
+
+# Ungültiger Währungscode: der Schnelltest meldet PROBLEM, die Fehlermeldung
+# kommt aus der vollständigen xmlschema-Prüfung
+INVALID_XML = SAMPLE_XML.replace(b'Ccy="EUR"', b'Ccy="EU"')
+
+CHILD_SCRIPT = r"""
+import importlib, json, sys, time
+t0 = time.perf_counter()
+for name in %(modules)r:
+    importlib.import_module(name)
+t_import = time.perf_counter() - t0
+from validators.hvb_validator_enhanced import HVBValidator
+lazy_loaded = [m for m in %(lazy)r if m in sys.modules]
+
+t1 = time.perf_counter()
+validator = HVBValidator(%(xsd)r)
+valid = validator.validate(%(xml)r)
+t_first = time.perf_counter() - t1
+fast_path = 'xmlschema' not in sys.modules
+
+t2 = time.perf_counter()
+invalid_rejected = not validator.validate(%(invalid)r) and validator.checks['xsd_valid']['status'] is False
+t_compile = time.perf_counter() - t2
+
+print(json.dumps({'import_s': t_import, 'first_validation_s': t_first, 'xsd_compile_s': t_compile,
+                  'valid': valid, 'fast_path': fast_path, 'invalid_rejected': invalid_rejected,
+                  'lazy_loaded': lazy_loaded}))
+"""
+
+
+def app_modules(repo_dir):
+    """Module, die app.py auf oberster Ebene importiert (in dieser Reihenfolge)"""
+    with open(os.path.join(repo_dir, 'app.py'), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            if name.split('.')[0] not in EXCLUDED_MODULES and name not in modules:
+                modules.append(name)
+    return modules
+
+
+def run_once(repo_dir, modules):
+    script = CHILD_SCRIPT % {
+        'modules': modules,
+        'lazy': LAZY_MODULES,
+        'xsd': os.path.join('schemas', 'pain.001.001.09.xsd'),
+        'xml': SAMPLE_XML,
+        'invalid': INVALID_XML,
+    }
+    out = subprocess.run(
+        [sys.executable, '-c', script], cwd=repo_dir,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kaltstart-Benchmark")
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    modules = app_modules(repo_dir)
+    results = [run_once(repo_dir, modules) for _ in range(args.runs)]
+
+    import_s = median([r['import_s'] for r in results])
+    first_s = median([r['first_validation_s'] for r in results])
+    compile_s = median([r['xsd_compile_s'] for r in results])
+    lazy_loaded = sorted(set(m for r in results for m in r['lazy_loaded']))
+
+    print(f"Module aus app.py:    {', '.join(modules)}")
+    print(f"Import-Zeit:          {import_s * 1000:8.1f} ms  (Budget {IMPORT_BUDGET_S * 1000:.0f} ms)")
+    print(f"Erste Validierung:    {first_s * 1000:8.1f} ms  (Budget {FIRST_VALIDATION_BUDGET_S * 1000:.0f} ms)")
+    print(f"XSD-Kompilierung:     {compile_s * 1000:8.1f} ms  (Budget {XSD_COMPILE_BUDGET_S * 1000:.0f} ms)")
+    print(f"Eager geladen:        {', '.join(lazy_loaded) or '-'}")
+
+    failed = []
+    if import_s > IMPORT_BUDGET_S:
+        failed.append("Import-Zeit")
+    if first_s > FIRST_VALIDATION_BUDGET_S:
+        failed.append("Erste Validierung")
+    if compile_s > XSD_COMPILE_BUDGET_S:
+        failed.append("XSD-Kompilierung")
+    if lazy_loaded:
+        failed.append("Lazy Imports")
+    if not all(r['valid'] for r in results):
+        failed.append("Beispieldatei ungültig")
+    if not all(r['fast_path'] for r in results):
+        failed.append("Schnelltest nicht genutzt")
+    if not all(r['invalid_rejected'] for r in results):
+        failed.append("Fehlerhafte Datei nicht erkannt")
+
+    if failed:
+        print(f"❌ Budget überschritten: {', '.join(failed)}")
+        return 1
+    print("✅ Kaltstart innerhalb des Budgets")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
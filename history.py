@@ -0,0 +1,168 @@
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_DB_PATH = os.environ.get(
+    "ISO_VALIDATOR_HISTORY",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.sqlite3")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    file_hash TEXT NOT NULL,
+    file_name TEXT,
+    profile TEXT NOT NULL,
+    ruleset_version TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    duration_ms REAL,
+    valid INTEGER,
+    error_count INTEGER,
+    warning_count INTEGER,
+    checks TEXT NOT NULL,
+    findings TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_lookup ON runs (file_hash, profile, ruleset_version, created_at);
+CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created_at);
+"""
+
+# Aufbewahrung: ältere Läufe und alles über MAX_RUNS hinaus wird gelöscht,
+# geprüft beim Öffnen und danach alle PRUNE_EVERY gespeicherten Läufe
+MAX_AGE_DAYS = 30
+MAX_RUNS = 1000
+PRUNE_EVERY = 50
+
+# Spalten für Listen-Ansichten (ohne die großen JSON-Felder)
+SUMMARY_COLUMNS = "id, file_hash, file_name, profile, ruleset_version, created_at, duration_ms, valid, error_count, warning_count"
+
+
+def file_hash(data):
+    """SHA-256 der Dateibytes als Schlüssel für den Verlauf"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class HistoryStore:
+    """
+    Lokaler Verlauf der Validierungsläufe (SQLite).
+    Pro Aufruf wird eine eigene Verbindung geöffnet, damit der Store aus
+    beliebigen Threads (Streamlit-Sessions) genutzt werden kann. Die
+    Aufbewahrungsregeln setzt der Store selbst durch (siehe save()), damit
+    sie für jeden Schreiber (App, Watcher-Worker) gelten.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_age_days=MAX_AGE_DAYS, max_runs=MAX_RUNS,
+                 prune_every=PRUNE_EVERY):
+        self.db_path = db_path
+        self.max_age_days = max_age_days
+        self.max_runs = max_runs
+        self.prune_every = prune_every
+        self._saves_since_prune = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        self.prune()
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, file_hash, file_name, profile, ruleset_version, duration_ms, valid, checks, findings):
+        """Speichert einen Lauf und gibt seine ID zurück"""
+        error_count = len([e for e in findings if e['level'] in ['CRITICAL', 'ERROR']])
+        warning_count = len([e for e in findings if e['level'] == 'WARNING'])
+        with self._connect() as conn:
+            cur = conn.execute(
+                "INSERT INTO runs (file_hash, file_name, profile, ruleset_version, created_at, duration_ms, "
+                "valid, error_count, warning_count, checks, findings) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file_hash, file_name, profile, ruleset_version, time.time(), duration_ms,
+                    int(bool(valid)), error_count, warning_count,
+                    json.dumps(checks, ensure_ascii=False), json.dumps(findings, ensure_ascii=False)
+                )
+            )
+            run_id = cur.lastrowid
+        
+        with self._lock:
+            self._saves_since_prune += 1
+            due = self._saves_since_prune >= self.prune_every
+            if due:
+                self._saves_since_prune = 0
+        if due:
+            self.prune()
+        return run_id
+
+    def lookup(self, file_hash, profile, ruleset_version):
+        """Letzter Lauf für Datei + Profil + Regelwerk, sonst None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM runs WHERE file_hash = ? AND profile = ? AND ruleset_version = ? "
+                "ORDER BY created_at DESC LIMIT 1",
+                (file_hash, profile, ruleset_version)
+            ).fetchone()
+        return self._decode(row) if row else None
+
+    def get(self, run_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return self._decode(row) if row else None
+
+    def recent(self, limit=20):
+        """Letzte Läufe (ohne Checks/Findings)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM runs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def search(self, term, limit=50):
+        """Suche nach Dateiname, Profil oder Hash-Präfix"""
+        like = f"%{term}%"
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT {SUMMARY_COLUMNS} FROM runs "
+                "WHERE file_name LIKE ? OR profile LIKE ? OR file_hash LIKE ? "
+                "ORDER BY created_at DESC LIMIT ?",
+                (like, like, f"{term}%", limit)
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def prune(self, max_age_days=None, max_runs=None):
+        """Löscht Läufe älter als max_age_days und alles über max_runs hinaus"""
+        max_age_days = self.max_age_days if max_age_days is None else max_age_days
+        max_runs = self.max_runs if max_runs is None else max_runs
+        cutoff = time.time() - max_age_days * 86400
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM runs WHERE created_at < ?", (cutoff,)).rowcount
+            deleted += conn.execute(
+                "DELETE FROM runs WHERE id NOT IN (SELECT id FROM runs ORDER BY created_at DESC LIMIT ?)",
+                (max_runs,)
+            ).rowcount
+        return deleted
+
+    def _decode(self, row):
+        record = dict(row)
+        record['checks'] = json.loads(record['checks'])
+        record['findings'] = json.loads(record['findings'])
+        record['valid'] = bool(record['valid'])
+        return record
+
+
+def restore(validator, record):
+    """Überträgt einen gespeicherten Lauf auf einen Validator (ohne Neuvalidierung)"""
+    for check_id, status in record['checks'].items():
+        if check_id in validator.checks:
+            validator.checks[check_id]['status'] = status
+    validator.errors = list(record['findings'])
+    validator.error_count = record['error_count']
+    return record['valid']
@@ -0,0 +1,198 @@
+import threading
+import time
+
+import utils
+from validators.archive import validate_archive
+from validators.base_validator_enhanced import ValidationCancelled
+
+# Anzeigetexte der Validierungsstufen
+STAGE_LABELS = {
+    'queued': "Wartet",
+    'parse': "XML geparst",
+    'xsd': "XSD-Prüfung abgeschlossen",
+    'sepa': "SEPA-Regeln",
+    'bank': "Bank-Regeln",
+    'rules': "Regeln",
+    'done': "Validierung abgeschlossen",
+    'extract': "Transaktionen ausgewertet",
+}
+
+
+class ValidationJob:
+    """
+    Führt validate() und die Datenextraktion in einem Hintergrund-Thread aus.
+
+    Der Fortschritt steht in self.progress (stage, done, total) und wird vom
+    Validator nach jeder Stufe und Regel aktualisiert. cancel() bricht an der
+    nächsten Regelgrenze ab. Checks und Findings sind während des Laufs über
+    self.validator einsehbar (Teilergebnisse).
+    """
+
+    def __init__(self, validator, xml_bytes, key=None, delta_cache=None):
+        self.validator = validator
+        self.xml_bytes = xml_bytes
+        self.key = key
+        self.delta_cache = delta_cache
+        self.state = 'queued'
+        self.progress = {'stage': 'queued', 'done': 0, 'total': 1}
+        self.tx_progress = (0, 0)
+        self.valid = None
+        self.data = None
+        self.error = None
+        self.duration_ms = None
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+        validator.cancel_event = self.cancel_event
+        validator.on_progress = self._on_progress
+        validator.delta_cache = delta_cache
+
+    def start(self):
+        self.state = 'running'
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'cancelled', 'failed')
+
+    def fraction(self):
+        """Grobe Gesamtfortschritt 0..1 über alle Stufen"""
+        stage = self.progress['stage']
+        order = ['queued', 'parse', 'xsd', 'rules', 'done', 'extract']
+        if stage in ('sepa', 'bank'):
+            # Regeln laufen je Sammler - Fortschritt über die Transaktionen
+            stage, part = 'rules', self.tx_progress[0] / max(self.tx_progress[1], 1)
+        else:
+            part = self.progress['done'] / max(self.progress['total'], 1)
+        step = order.index(stage) if stage in order else 0
+        return min(1.0, (step + part) / len(order)) if self.state != 'done' else 1.0
+
+    def label(self):
+        stage = self.progress['stage']
+        text = STAGE_LABELS.get(stage, stage)
+        if stage in ('sepa', 'bank', 'extract'):
+            text += f": {self.progress['done']} von {self.progress['total']}"
+        if stage in ('sepa', 'bank', 'rules'):
+            text += f" · {self.tx_progress[0]} von {self.tx_progress[1]} Transaktionen geprüft"
+        return text
+
+    def _on_progress(self, stage, done, total):
+        if stage == 'rules':
+            self.tx_progress = (done, total)
+        self.progress = {'stage': stage, 'done': done, 'total': total}
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            self.valid = self.validator.validate(self.xml_bytes)
+            if self.cancel_event.is_set():
+                raise ValidationCancelled()
+            self.data = utils.parse_payment_data(
+                self.xml_bytes,
+                on_progress=lambda done, total: self._on_progress('extract', done, total),
+                cache=self.delta_cache
+            )
+            self.state = 'cancelled' if self.cancel_event.is_set() else 'done'
+        except ValidationCancelled:
+            self.state = 'cancelled'
+        except Exception as e:
+            self.error = e
+            self.state = 'failed'
+        finally:
+            self.duration_ms = (time.perf_counter() - started) * 1000
+            self.validator.on_progress = None
+            self.validator.cancel_event = None
+
+
+class ArchiveValidationJob:
+    """
+    Validiert alle Dateien eines ZIP/GZ-Archivs in einem Hintergrund-Thread
+    (Member nacheinander). Schnittstelle wie ValidationJob: state,
+    finished, fraction(), label(), cancel(). self.validator ist der
+    Validator des gerade geprüften Members, self.results die fertigen
+    Ergebnisse (siehe validate_archive).
+    """
+
+    def __init__(self, validator_factory, file_name, data, key=None):
+        self.validator_factory = validator_factory
+        self.file_name = file_name
+        self.data = data
+        self.key = key
+        self.state = 'queued'
+        self.progress = {'stage': 'queued', 'done': 0, 'total': 1}
+        self.member = None
+        self.member_progress = (0, 0)
+        self.invalid_count = 0
+        self.validator = None
+        self.results = None
+        self.error = None
+        self.duration_ms = None
+        self.cancel_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.state = 'running'
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def finished(self):
+        return self.state in ('done', 'cancelled', 'failed')
+
+    def fraction(self):
+        """Fortschritt 0..1: fertige Member plus Stufe des laufenden Members"""
+        if self.state == 'done':
+            return 1.0
+        done, total = self.member_progress
+        order = ['queued', 'parse', 'xsd', 'rules', 'done']
+        stage = self.progress['stage']
+        if stage in ('sepa', 'bank'):
+            stage = 'rules'
+        part = order.index(stage) / len(order) if stage in order else 0
+        return min(1.0, (done + part) / max(total, 1))
+
+    def label(self):
+        done, total = self.member_progress
+        if self.member is None:
+            return STAGE_LABELS['queued']
+        stage = self.progress['stage']
+        return f"Datei {done + 1} von {total}: {self.member} · {STAGE_LABELS.get(stage, stage)}"
+
+    def _on_progress(self, stage, done, total):
+        self.progress = {'stage': stage, 'done': done, 'total': total}
+
+    def _on_member(self, done, total, member, validator):
+        if self.validator is not None and self.validator.error_count:
+            self.invalid_count += 1
+        self.member = member
+        self.member_progress = (done, total)
+        self.progress = {'stage': 'queued', 'done': 0, 'total': 1}
+        validator.on_progress = self._on_progress
+        if self.validator is not None:
+            self.validator.on_progress = None
+        self.validator = validator
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            self.results = validate_archive(
+                self.file_name, self.data, self.validator_factory,
+                on_member=self._on_member, cancel_event=self.cancel_event
+            )
+            self.state = 'done'
+        except ValidationCancelled:
+            self.state = 'cancelled'
+        except Exception as e:
+            self.error = e
+            self.state = 'failed'
+        finally:
+            self.duration_ms = (time.perf_counter() - started) * 1000
+            if self.validator is not None:
+                self.validator.on_progress = None
@@ -0,0 +1,294 @@
+"""
+Automatische Korrektur mechanisch behebbarer SEPA-Findings.
+
+Die Datei wird in zwei Durchläufen gestreamt (konstanter Speicherbedarf):
+  1. Anzahl und Summe der Transaktionen je Sammler und gesamt,
+  2. Schreiben über etree.xmlfile, dabei werden korrigiert:
+     - Verwendungszweck (Ustrd): Umlaute/Sonderzeichen in den SEPA-Zeichensatz
+     - MsgId/PmtInfId/EndToEndId: Slashes am Anfang/Ende und doppelte Slashes
+     - IBAN/BIC: Leerzeichen entfernen, Großschreibung
+     - NbOfTxs/CtrlSum in GrpHdr und PmtInf, wenn sie nicht stimmen
+Jede Änderung landet im Änderungsprotokoll (Zeile, Feld, alt, neu). Ein
+Verwendungszweck ohne abbildbare Zeichen bleibt unverändert und wird als
+nicht behebbar protokolliert.
+
+Aufruf:  python repair.py DATEI.xml [-o AUSGABE.xml] [--log AENDERUNGEN.csv]
+"""
+import argparse
+import io
+import os
+import re
+import sys
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+from lxml import etree
+
+import reports
+from validators.schema_registry import default_registry
+
+CHANGE_FIELDS = ['line', 'tag', 'rule', 'old', 'new']
+
+# Umschrift in den SEPA-Zeichensatz (vor dem Entfernen der Akzente)
+SEPA_TRANSLITERATION = str.maketrans({
+    'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'Ä': 'Ae', 'Ö': 'Oe', 'Ü': 'Ue', 'ß': 'ss',
+    '&': '+', '_': '-', '"': "'", '`': "'", '´': "'", '„': "'", '“': "'", '”': "'",
+    '‚': "'", '‘': "'", '’': "'", '–': '-', '—': '-', '[': '(', ']': ')', '{': '(', '}': ')',
+    ';': ',', '!': '.', '€': 'EUR', '\t': ' ', '\n': ' ', '\r': ' ',
+})
+SEPA_CHAR = re.compile(r"[a-zA-Z0-9/?:().,'+ \-]")
+SEPA_TEXT = re.compile(r"^[a-zA-Z0-9/?:().,'+ \-]*$")
+USTRD_MAX_LENGTH = 140
+
+# Container, deren Start-/End-Tag einzeln geschrieben wird - alle anderen
+# Elemente werden als fertiger Teilbaum geschrieben und danach freigegeben
+CONTAINERS = ('Document', 'CstmrCdtTrfInitn', 'PmtInf')
+
+
+def to_sepa_text(text):
+    """Umschrift in den SEPA-Zeichensatz; Unbekanntes wird zu Leerzeichen"""
+    text = unicodedata.normalize('NFKD', text.translate(SEPA_TRANSLITERATION))
+    chars = []
+    for c in text:
+        if SEPA_CHAR.match(c):
+            chars.append(c)
+        elif not unicodedata.combining(c):
+            chars.append(' ')
+    return re.sub(r' {2,}', ' ', ''.join(chars)).strip()
+
+
+def fix_slashes(text):
+    """Slashes am Anfang/Ende entfernen, doppelte zusammenfassen (HVB-Regel)"""
+    fixed = re.sub(r'/{2,}', '/', text).strip('/')
+    return fixed or 'NOTPROVIDED'
+
+
+def compact_identifier(text):
+    """IBAN/BIC ohne Leerzeichen, in Großbuchstaben"""
+    return ''.join(text.split()).upper()
+
+
+def _read_source(xml_source):
+    """Zwei Durchläufe brauchen eine wiederholt lesbare Quelle (Bytes oder Pfad)"""
+    if isinstance(xml_source, (bytes, bytearray)):
+        return lambda: io.BytesIO(xml_source)
+    return lambda: open(xml_source, 'rb')
+
+
+def format_sum(amount_sum):
+    """CtrlSum mit zwei Nachkommastellen, außer die Beträge haben mehr"""
+    if amount_sum == amount_sum.quantize(Decimal('0.01')):
+        return f"{amount_sum:.2f}"
+    return str(amount_sum)
+
+
+def _amount(tx, pain):
+    amt = tx.find(f'{pain}Amt/{pain}InstdAmt')
+    if amt is None:
+        amt = tx.find(f'{pain}Amt/{pain}EqvtAmt/{pain}Amt')
+    try:
+        return Decimal(amt.text.strip()) if amt is not None and amt.text else Decimal(0)
+    except InvalidOperation:
+        return Decimal(0)
+
+
+def count_transactions(open_source, pain):
+    """Durchlauf 1: (Anzahl, Summe) je Sammler in Dateireihenfolge"""
+    batches = []
+    with open_source() as stream:
+        for event, elem in etree.iterparse(stream, events=('start', 'end'), tag=(pain + 'PmtInf', pain + 'CdtTrfTxInf')):
+            if elem.tag == pain + 'PmtInf':
+                if event == 'start':
+                    batches.append([0, Decimal(0)])
+                else:
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
+            elif event == 'end':
+                batches[-1][0] += 1
+                batches[-1][1] += _amount(elem, pain)
+                elem.clear()
+    return batches
+
+
+class Repairer:
+    """Korrekturregeln für einen Teilbaum; sammelt das Änderungsprotokoll"""
+
+    def __init__(self, namespace, bic_tag):
+        self.pain = '{%s}' % namespace
+        self.bic_tag = bic_tag
+        self.changes = []
+
+    def _change(self, elem, rule, new):
+        old = elem.text or ''
+        if new != old:
+            self._log(elem, rule, old, new)
+            elem.text = new
+
+    def _log(self, elem, rule, old, new):
+        self.changes.append({
+            'line': elem.sourceline or 0,
+            'tag': etree.QName(elem).localname,
+            'rule': rule,
+            'old': old,
+            'new': new,
+        })
+
+    def fix(self, subtree):
+        pain = self.pain
+        for elem in subtree.iter(pain + 'Ustrd'):
+            if elem.text and not SEPA_TEXT.match(elem.text):
+                fixed = to_sepa_text(elem.text)
+                if not fixed:
+                    # Nichts Abbildbares (z.B. nur Symbole) - ein leeres Ustrd
+                    # wäre XSD-ungültig (minLength 1), Wert bleibt stehen
+                    self._log(elem, "SEPA Zeichensatz (nicht behebbar)", elem.text, elem.text)
+                    continue
+                if len(fixed) > USTRD_MAX_LENGTH:
+                    fixed = fixed[:USTRD_MAX_LENGTH].rstrip()
+                self._change(elem, "SEPA Zeichensatz", fixed)
+        for elem in subtree.iter(pain + 'MsgId', pain + 'PmtInfId', pain + 'EndToEndId'):
+            if elem.text and re.search(r'^/|/$|//', elem.text):
+                self._change(elem, "Slash-Regel", fix_slashes(elem.text))
+        for elem in subtree.iter(pain + 'IBAN', pain + self.bic_tag):
+            if elem.text and elem.text.strip():
+                self._change(elem, "IBAN/BIC Format", compact_identifier(elem.text))
+
+    def fix_totals(self, node, tx_count, amount_sum):
+        """NbOfTxs/CtrlSum im GrpHdr auf die Ist-Werte setzen"""
+        for elem in node.iterchildren(self.pain + 'NbOfTxs', self.pain + 'CtrlSum'):
+            self.fix_total(elem, tx_count, amount_sum)
+
+    def fix_total(self, elem, tx_count, amount_sum):
+        """Ein einzelnes NbOfTxs- oder CtrlSum-Element (im PmtInf kommen sie einzeln)"""
+        if elem.tag == self.pain + 'NbOfTxs':
+            if (elem.text or '').strip() != str(tx_count):
+                self._change(elem, "Kontrollsummen", str(tx_count))
+            return
+        try:
+            declared = Decimal((elem.text or '').strip())
+        except InvalidOperation:
+            declared = None
+        if declared != amount_sum:
+            self._change(elem, "Kontrollsummen", format_sum(amount_sum))
+
+
+def repair(xml_source, out):
+    """
+    Schreibt die korrigierte Datei nach out (Binär-Stream) und gibt das
+    Änderungsprotokoll zurück. xml_source: Bytes oder Pfad.
+    """
+    open_source = _read_source(xml_source)
+    with open_source() as stream:
+        _event, root = next(etree.iterparse(stream, events=('start',)))
+        root_name = etree.QName(root)
+    if root_name.localname != 'Document':
+        raise ValueError(f"Keine pain.001-Datei: Wurzelelement {root_name.localname}")
+    namespace = root_name.namespace or default_registry().default.namespace
+    fields = default_registry().fields_for(namespace)
+    pain = '{%s}' % namespace
+    containers = {pain + name for name in CONTAINERS}
+
+    batches = count_transactions(open_source, pain)
+    total_count = sum(b[0] for b in batches)
+    total_sum = sum((b[1] for b in batches), Decimal(0))
+
+    repairer = Repairer(namespace, fields['bic'])
+    state = {'batch': -1, 'strip_ns': False}
+
+    def flush(node, xf, upto=None):
+        """Schreibt die fertigen Kinder von node (bis ausschließlich upto) und gibt sie frei"""
+        for child in list(node):
+            if child is upto:
+                break
+            node.remove(child)
+            if not isinstance(child.tag, str):
+                continue
+            child.tail = None
+            repairer.fix(child)
+            if child.tag == pain + 'GrpHdr':
+                repairer.fix_totals(child, total_count, total_sum)
+            elif node.tag == pain + 'PmtInf' and child.tag in (pain + 'NbOfTxs', pain + 'CtrlSum'):
+                repairer.fix_total(child, *batches[state['batch']])
+            if state['strip_ns']:
+                # Standard-Namespace des Dokuments: Teilbaum ohne eigene
+                # xmlns-Deklaration schreiben
+                for elem in child.iter(pain + '*'):
+                    elem.tag = elem.tag[len(pain):]
+                etree.cleanup_namespaces(child)
+            xf.write(child)
+            xf.write('\n')
+
+    # Ereignisse nur für Container und Transaktionen: alles vor dem Element
+    # eines Ereignisses ist vollständig geparst und wird dann geschrieben
+    with open_source() as stream, etree.xmlfile(out, encoding='UTF-8') as xf:
+        xf.write_declaration()
+        open_elements = []
+        events = etree.iterparse(stream, events=('start', 'end'), remove_comments=True,
+                                 tag=tuple(containers) + (pain + 'CdtTrfTxInf',))
+        for event, elem in events:
+            parent = elem.getparent()
+            if elem.tag == pain + 'CdtTrfTxInf':
+                if event == 'end' and parent is not None and parent.tag == pain + 'PmtInf':
+                    # Der Parser kann schon weiter sein - nur bis hierher schreiben
+                    flush(parent, xf, upto=elem.getnext())
+                continue
+            if parent is not None and parent.tag not in containers:
+                continue
+
+            if event == 'start':
+                if parent is None:
+                    state['strip_ns'] = elem.nsmap.get(None) == namespace
+                else:
+                    flush(parent, xf, upto=elem)
+                if elem.tag == pain + 'PmtInf':
+                    state['batch'] += 1
+                writer = xf.element(elem.tag, dict(elem.attrib), nsmap=elem.nsmap if parent is None else None)
+                writer.__enter__()
+                open_elements.append(writer)
+                xf.write('\n')
+            else:
+                flush(elem, xf)
+                open_elements.pop().__exit__(None, None, None)
+                if open_elements:
+                    xf.write('\n')
+                if parent is not None:
+                    parent.remove(elem)
+    return repairer.changes
+
+
+def write_change_log(fmt, fp, changes):
+    """Änderungsprotokoll als JSONL oder CSV"""
+    if fmt == 'junit':
+        raise ValueError("Das Änderungsprotokoll gibt es nur als JSONL oder CSV")
+    writer = reports.open_writer(fmt, fp, CHANGE_FIELDS)
+    for change in changes:
+        writer.write(change)
+    writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Behebbare SEPA-Findings automatisch korrigieren")
+    parser.add_argument('file', help="pain.001 XML-Datei")
+    parser.add_argument('-o', '--output', help="Ausgabedatei (Standard: <datei>_repariert.xml)")
+    parser.add_argument('--log', help="Änderungsprotokoll (.jsonl oder .csv)")
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.file)[0] + '_repariert.xml'
+    with open(output, 'wb') as out:
+        changes = repair(args.file, out)
+
+    if args.log:
+        fmt = 'csv' if args.log.lower().endswith('.csv') else 'jsonl'
+        with open(args.log, 'wb') as fp:
+            write_change_log(fmt, fp, changes)
+    else:
+        for change in changes:
+            print(f"Zeile {change['line']:>6}  {change['tag']:<12} {change['rule']:<18} "
+                  f"'{change['old']}' -> '{change['new']}'")
+    print(f"{len(changes)} Änderungen -> {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import contextlib
+import csv
+import io
+import json
+from lxml import etree
+
+# Format -> (MIME-Type, Dateiendung)
+FORMATS = {
+    'jsonl': ('application/x-ndjson', '.jsonl'),
+    'csv': ('text/csv', '.csv'),
+    'junit': ('application/xml', '.xml'),
+}
+
+REPORT_FIELDS = ['type', 'check', 'name', 'level', 'status', 'line', 'tag', 'title', 'msg']
+PAYMENT_FIELDS = [
+    'batch_id', 'batch_date', 'dbtr', 'dbtr_iban',
+    'e2e', 'instr_id', 'amt', 'ccy', 'cdtr', 'cdtr_iban', 'cdtr_bic', 'purp', 'rmt'
+]
+
+
+def finding_record(finding):
+    """Report-Zeile für ein Finding aus validator.errors"""
+    record = {'type': 'finding'}
+    record.update(finding)
+    return record
+
+
+def check_record(check_id, check):
+    """Report-Zeile für einen Eintrag aus validator.checks"""
+    return {
+        'type': 'check',
+        'check': check_id,
+        'name': check['name'],
+        'level': check['level'],
+        'status': check['status'],
+    }
+
+
+class JSONLWriter:
+    """Eine JSON-Zeile pro Datensatz"""
+
+    def __init__(self, fp, fields=None):
+        self.out = io.TextIOWrapper(fp, encoding='utf-8', newline='', write_through=True)
+
+    def write(self, record):
+        self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.out.flush()
+        self.out.detach()
+
+
+class CSVWriter:
+    """CSV mit Semikolon (Excel DE) und fester Spaltenliste"""
+
+    def __init__(self, fp, fields):
+        self.out = io.TextIOWrapper(fp, encoding='utf-8-sig', newline='', write_through=True)
+        self.writer = csv.DictWriter(self.out, fieldnames=fields, delimiter=';', extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write(self, record):
+        self.writer.writerow(record)
+
+    def close(self):
+        self.out.flush()
+        self.out.detach()
+
+
+class JUnitWriter:
+    """
+    JUnit XML für CI-Systeme. Findings werden als eigene Testcases in der
+    Suite "Findings" geschrieben, danach folgen die Checks in der Suite
+    "Checks". Das Dokument wird mit etree.xmlfile inkrementell geschrieben.
+    """
+
+    def __init__(self, fp, fields=None):
+        self.stack = contextlib.ExitStack()
+        self.xf = self.stack.enter_context(etree.xmlfile(fp, encoding='utf-8'))
+        self.xf.write_declaration()
+        self.stack.enter_context(self.xf.element('testsuites', name='ISO 20022 Payment Validator'))
+        self.suite = None
+        self.suite_stack = None
+
+    def _open_suite(self, name):
+        if self.suite == name:
+            return
+        if self.suite_stack is not None:
+            self.suite_stack.close()
+        self.suite_stack = contextlib.ExitStack()
+        self.suite_stack.enter_context(self.xf.element('testsuite', name=name))
+        self.suite = name
+
+    def write(self, record):
+        if record['type'] == 'finding':
+            self._open_suite('Findings')
+            case = etree.Element('testcase', classname=str(record.get('tag', '')),
+                                 name=f"Zeile {record.get('line', 0)}: {record.get('title', '')}")
+            if record['level'] in ['CRITICAL', 'ERROR']:
+                failure = etree.SubElement(case, 'failure', type=record['level'], message=str(record.get('msg', '')))
+                failure.text = str(record.get('msg', ''))
+            else:
+                etree.SubElement(case, 'system-out').text = f"{record['level']}: {record.get('msg', '')}"
+        else:
+            self._open_suite('Checks')
+            case = etree.Element('testcase', classname=record['level'], name=record['name'])
+            if record['status'] is False:
+                etree.SubElement(case, 'failure', type='CHECK', message=f"{record['name']} fehlgeschlagen")
+            elif record['status'] is None:
+                etree.SubElement(case, 'skipped')
+        self.xf.write(case)
+
+    def close(self):
+        if self.suite_stack is not None:
+            self.suite_stack.close()
+        self.stack.close()
+
+
+WRITERS = {'jsonl': JSONLWriter, 'csv': CSVWriter, 'junit': JUnitWriter}
+
+
+def open_writer(fmt, fp, fields=REPORT_FIELDS):
+    """Öffnet einen Report-Writer für fmt auf dem Binär-Stream fp"""
+    if fmt not in WRITERS:
+        raise ValueError(f"Unbekanntes Report-Format: {fmt}")
+    return WRITERS[fmt](fp, fields)
+
+
+def write_validation_report(fmt, fp, checks, findings):
+    """Schreibt Findings und Checks eines abgeschlossenen Laufs"""
+    writer = open_writer(fmt, fp)
+    for finding in findings:
+        writer.write(finding_record(finding))
+    for check_id, check in checks.items():
+        writer.write(check_record(check_id, check))
+    writer.close()
+
+
+def stream_validation_report(validator, xml_content, fmt, fp, keep_errors=False):
+    """
+    Validiert xml_content und schreibt jedes Finding sofort in den Report,
+    ohne es in validator.errors zu sammeln (konstanter Speicherbedarf auch
+    bei Millionen Findings). Mit keep_errors=True bleiben die Findings
+    zusätzlich in validator.errors (z.B. für den Verlauf). Gibt das
+    Validierungsergebnis zurück.
+    """
+    writer = open_writer(fmt, fp)
+    validator.on_finding = lambda finding: writer.write(finding_record(finding))
+    validator.collect_errors = keep_errors
+    try:
+        valid = validator.validate(xml_content)
+    finally:
+        validator.on_finding = None
+        validator.collect_errors = True
+
+    for check_id, check in validator.checks.items():
+        writer.write(check_record(check_id, check))
+    writer.close()
+    return valid
+
+
+def write_payment_export(fmt, fp, transactions):
+    """Schreibt die extrahierten Zahlungen (z.B. aus utils.iter_transactions)"""
+    if fmt == 'junit':
+        raise ValueError("JUnit XML ist nur für Validierungsberichte verfügbar")
+    writer = open_writer(fmt, fp, PAYMENT_FIELDS)
+    for tx in transactions:
+        writer.write(tx)
+    writer.close()
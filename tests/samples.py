@@ -0,0 +1,35 @@
+"""Erzeugte Beispieldateien für die Tests"""
+from lxml import etree
+
+PREFIX = 'urn:iso:std:iso:20022:tech:xsd:'
+NS = PREFIX + 'pain.001.001.09'
+
+
+def build_document(batches=2, txs=2, message='pain.001.001.09'):
+    """Gültige pain.001-Datei der angegebenen Version"""
+    # .03: BIC statt BICFI, Ausführungsdatum ohne Dt-Wrapper
+    bic = 'BIC' if message == 'pain.001.001.03' else 'BICFI'
+    exctn = '2025-01-02' if message == 'pain.001.001.03' else '<Dt>2025-01-02</Dt>'
+    out = ['<?xml version="1.0" encoding="UTF-8"?>',
+           f'<Document xmlns="{PREFIX}{message}"><CstmrCdtTrfInitn>',
+           f'<GrpHdr><MsgId>MSG1</MsgId><CreDtTm>2025-01-01T10:00:00</CreDtTm><NbOfTxs>{batches * txs}</NbOfTxs>'
+           f'<CtrlSum>{batches * txs * 10}.00</CtrlSum><InitgPty><Nm>KTC GmbH</Nm></InitgPty></GrpHdr>']
+    for b in range(batches):
+        out.append(f'<PmtInf><PmtInfId>PMT{b}</PmtInfId><PmtMtd>TRF</PmtMtd><NbOfTxs>{txs}</NbOfTxs>'
+                   f'<CtrlSum>{txs * 10}.00</CtrlSum><PmtTpInf><SvcLvl><Cd>SEPA</Cd></SvcLvl></PmtTpInf>'
+                   f'<ReqdExctnDt>{exctn}</ReqdExctnDt><Dbtr><Nm>KTC GmbH</Nm></Dbtr>'
+                   '<DbtrAcct><Id><IBAN>DE89370400440532013000</IBAN></Id></DbtrAcct>'
+                   f'<DbtrAgt><FinInstnId><{bic}>COBADEFFXXX</{bic}></FinInstnId></DbtrAgt><ChrgBr>SLEV</ChrgBr>')
+        for t in range(txs):
+            out.append(f'<CdtTrfTxInf><PmtId><EndToEndId>E2E-{b}-{t}</EndToEndId></PmtId>'
+                       '<Amt><InstdAmt Ccy="EUR">10.00</InstdAmt></Amt>'
+                       f'<Cdtr><Nm>Max Mustermann {t}</Nm></Cdtr>'
+                       '<CdtrAcct><Id><IBAN>DE02120300000000202051</IBAN></Id></CdtrAcct>'
+                       f'<RmtInf><Ustrd>Rechnung {b}-{t}</Ustrd></RmtInf></CdtTrfTxInf>')
+        out.append('</PmtInf>')
+    out.append('</CstmrCdtTrfInitn></Document>')
+    return '\n'.join(out).encode('utf-8')
+
+
+def parse(xml_bytes):
+    return etree.fromstring(xml_bytes, etree.XMLParser(remove_blank_text=True))
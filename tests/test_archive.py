@@ -0,0 +1,71 @@
+"""Archive: Grenzen für Anzahl und entpackte Größe (Zip-Bomben)"""
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from validators import archive
+from validators.hvb_validator_enhanced import HVBValidator
+
+from .samples import build_document
+
+
+def _zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_valid_archive():
+    data = _zip({'a.xml': build_document(), '__MACOSX/._a.xml': b'x', 'b.xml': build_document(batches=1)})
+    results = archive.validate_archive('test.zip', data, HVBValidator)
+    assert [r['member'] for r in results] == ['a.xml', 'b.xml']
+    assert all(r['valid'] for r in results)
+
+
+def test_too_many_members(monkeypatch):
+    monkeypatch.setattr(archive, 'MAX_MEMBERS', 2)
+    data = _zip({f'{i}.xml': build_document() for i in range(3)})
+    with pytest.raises(archive.ArchiveLimitExceeded):
+        archive.list_members('test.zip', data)
+    with pytest.raises(archive.ArchiveLimitExceeded):
+        archive.validate_archive('test.zip', data, HVBValidator)
+
+
+def test_total_size(monkeypatch):
+    data = _zip({'a.xml': build_document(), 'b.xml': build_document()})
+    monkeypatch.setattr(archive, 'MAX_TOTAL_SIZE', len(build_document()) * 2 - 1)
+    with pytest.raises(archive.ArchiveLimitExceeded):
+        archive.list_members('test.zip', data)
+
+
+def test_oversized_zip_member(monkeypatch):
+    monkeypatch.setattr(archive, 'MAX_MEMBER_SIZE', 1000)
+    data = _zip({'bombe.xml': b'<a>' + b' ' * 10_000 + b'</a>', 'ok.xml': build_document(batches=1, txs=1)})
+    with pytest.raises(archive.ArchiveLimitExceeded):
+        archive.read_member('test.zip', data, 'bombe.xml')
+
+    results = archive.validate_archive('test.zip', data, HVBValidator)
+    assert results[0]['valid'] is False
+    assert results[0]['validator'].errors[0]['title'] == "Archiv Fehler"
+    assert results[1]['valid'] is True
+
+
+def test_gzip_read_is_bounded(monkeypatch):
+    monkeypatch.setattr(archive, 'MAX_MEMBER_SIZE', 1000)
+    data = gzip.compress(b'<a>' + b' ' * 10_000_000 + b'</a>')
+    assert len(data) < 20_000
+    with pytest.raises(archive.ArchiveLimitExceeded):
+        archive.read_member('test.xml.gz', data, 'test.xml')
+
+    results = archive.validate_archive('test.xml.gz', data, HVBValidator)
+    assert results[0]['valid'] is False
+    assert results[0]['validator'].errors[0]['title'] == "Archiv Fehler"
+
+
+def test_gzip_within_limit():
+    xml = build_document()
+    assert archive.read_member('test.xml.gz', gzip.compress(xml), 'test.xml') == xml
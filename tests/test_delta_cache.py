@@ -0,0 +1,71 @@
+"""Delta-Cache: erneut hochgeladene Dateien liefern dasselbe Ergebnis wie ein kalter Lauf"""
+import pytest
+
+from validators.delta_cache import DeltaCache
+from validators.hvb_validator_enhanced import HVBValidator
+
+from .samples import build_document
+
+ORIGINAL = build_document(batches=3, txs=3)
+
+
+def _replace_last(xml, old, new):
+    i = xml.rfind(old)
+    assert i >= 0
+    return xml[:i] + new + xml[i + len(old):]
+
+
+def _run(xml, cache=None, fast_xsd=True):
+    validator = HVBValidator()
+    validator.delta_cache = cache
+    validator.fast_xsd = fast_xsd
+    valid = validator.validate(xml)
+    findings = [(e['line'], e['tag'], e['level'], e['title'], e['msg']) for e in validator.errors]
+    return valid, findings, {k: c['status'] for k, c in validator.checks.items()}
+
+
+# (erster Upload, zweiter Upload) - jeweils nur der letzte Sammler geändert;
+# die Fehler stehen in dessen letzter Transaktion, Zeilenumbrüche davor
+# verschieben sie innerhalb des Sammlers
+CHARSET_ERROR = _replace_last(ORIGINAL, b'Rechnung 2-2', b'Rechnung@2-2')
+XSD_ERROR = _replace_last(ORIGINAL, b'Ccy="EUR"', b'Ccy="EU"')
+LINE_BREAKS = _replace_last(ORIGINAL, b'<CdtTrfTxInf>', b'\n\n\n<CdtTrfTxInf>')
+SHIFTED = _replace_last(ORIGINAL, b'<PmtInf>', b'\n\n<PmtInf>')
+CASES = {
+    'korrigiert': (CHARSET_ERROR, ORIGINAL),
+    'neuer Fehler': (ORIGINAL, CHARSET_ERROR),
+    'XSD korrigiert': (XSD_ERROR, ORIGINAL),
+    'XSD-Fehler': (ORIGINAL, XSD_ERROR),
+    'Zeilenumbrüche': (ORIGINAL, LINE_BREAKS),
+    'Zeilenumbrüche mit Fehler': (CHARSET_ERROR, _replace_last(CHARSET_ERROR, b'<CdtTrfTxInf>', b'\n\n\n<CdtTrfTxInf>')),
+    'verschobener Sammler': (CHARSET_ERROR, _replace_last(CHARSET_ERROR, b'<PmtInf>', b'\n\n<PmtInf>')),
+    'XSD-Fehler mit Zeilenumbrüchen': (XSD_ERROR, _replace_last(XSD_ERROR, b'<CdtTrfTxInf>', b'\n\n\n<CdtTrfTxInf>')),
+    'XSD-Fehler verschoben': (XSD_ERROR, _replace_last(XSD_ERROR, b'<PmtInf>', b'\n\n<PmtInf>')),
+}
+# Bei XSD-Fehlern laufen keine Regeln, und gültige Dateien gehen über den
+# Schnelltest - mit Schnelltest gibt es hier nichts wiederzuverwenden
+NO_REUSE_WITH_FAST_XSD = {'XSD korrigiert', 'XSD-Fehler'}
+
+
+@pytest.mark.parametrize('fast_xsd', [True, False])
+@pytest.mark.parametrize('case', list(CASES))
+def test_delta_run_equals_cold_run(case, fast_xsd):
+    first, second = CASES[case]
+    cache = DeltaCache()
+    _run(first, cache, fast_xsd)
+    hits = cache.hits
+
+    delta = _run(second, cache, fast_xsd)
+    cold = _run(second, None, fast_xsd)
+    assert delta == cold
+    # Unveränderte Sammler kamen aus dem Cache
+    if not (fast_xsd and case in NO_REUSE_WITH_FAST_XSD):
+        assert cache.hits > hits
+
+
+def test_cases_change_the_result():
+    # Plausibilität: die Fälle treffen wirklich Fehler in verschiedenen Prüfungen
+    assert _run(CHARSET_ERROR)[2]['sepa_charset'] is False
+    assert _run(XSD_ERROR)[2]['xsd_valid'] is False
+    assert _run(LINE_BREAKS)[0] is True
+    assert _run(SHIFTED)[0] is True
@@ -0,0 +1,103 @@
+"""
+Äquivalenz Schnelltest <-> xmlschema: der Schnelltest darf nie OK melden,
+wenn die vollständige Prüfung Fehler findet.
+"""
+import copy
+import random
+
+import pytest
+from lxml import etree
+
+from validators.fast_xsd import OK, fast_check
+from validators.hvb_validator_enhanced import HVBValidator
+from validators.schema_registry import default_registry, get_schema
+
+from .samples import NS, PREFIX, build_document, parse
+
+XSD_PATH = default_registry().get(NS).xsd_path
+MESSAGES = ['pain.001.001.03', 'pain.001.001.09', 'pain.001.001.12']
+
+# Werte, die an Lexik und Facetten der Basistypen rühren
+TRICKY_VALUES = [
+    '', ' ', '0', '-1', '1.', '.5', '+10.00', '10.001', '1e3', 'NaN', '10,00',
+    '١٠.00', '٢٠٢٥-01-02', '2025-01-02', '2025-02-30', '0000-01-01', '2025-01-02Z',
+    '2025-01-02+14:01', '2025-01-01T24:00:00', '2025-01-01T10:00:00.5+01:00',
+    ' 10.00', '10.00 ', ' 10.00 ', '\t2025-01-02\n', 'EUR', 'eur', 'XXXX',
+    'SEPA', 'TRF', 'SLEV', 'true', 'DE89370400440532013000', 'DE89 3704', 'COBADEFFXXX',
+    'cobadeffxxx', '１２', 'A' * 35, 'A' * 36, 'A' * 140, 'A' * 141, '12345678901234567890',
+]
+
+
+def full_valid(tree, xsd_path=XSD_PATH):
+    return next(iter(get_schema(xsd_path).iter_errors(tree)), None) is None
+
+
+def mutations(message='pain.001.001.09', seed=20250102, count=1500):
+    """(Beschreibung, Baum) - Werte, Attribute und Struktur verändert"""
+    pain = '{%s%s}' % (PREFIX, message)
+    base = parse(build_document(message=message))
+    paths = [base.getroottree().getpath(e) for e in base.iter() if e is not base]
+    rnd = random.Random(seed)
+    for _ in range(count):
+        tree = copy.deepcopy(base)
+        elem = tree.getroottree().xpath(rnd.choice(paths))[0]
+        kind = rnd.choice(['text', 'text', 'text', 'attr', 'delete', 'duplicate', 'swap', 'foreign'])
+        if kind == 'text' and not len(elem):
+            elem.text = rnd.choice(TRICKY_VALUES)
+        elif kind == 'attr':
+            if 'Ccy' in elem.attrib and rnd.random() < 0.7:
+                elem.set('Ccy', rnd.choice(TRICKY_VALUES))
+            else:
+                elem.set(rnd.choice(['Ccy', 'x']), 'EUR')
+        elif kind == 'delete':
+            elem.getparent().remove(elem)
+        elif kind == 'duplicate':
+            elem.addnext(copy.deepcopy(elem))
+        elif kind == 'swap' and elem.getnext() is not None:
+            elem.addprevious(elem.getnext())
+        elif kind == 'foreign':
+            etree.SubElement(elem, pain + rnd.choice(['Nm', 'Cd', 'Unbekannt'])).text = 'X'
+        yield f"{kind} {tree.getroottree().getpath(elem) if elem.getparent() is not None else ''}", tree
+
+
+@pytest.mark.parametrize('message', MESSAGES)
+def test_generated_document_is_valid(message):
+    xsd_path = default_registry().get(PREFIX + message).xsd_path
+    tree = parse(build_document(message=message))
+    assert full_valid(tree, xsd_path)
+    assert fast_check(xsd_path, tree) == OK
+
+
+@pytest.mark.parametrize('xpath,value', [
+    ('//p:InstdAmt', '١٠.00'),
+    ('//p:Dt', '٢٠٢٥-01-02'),
+    ('//p:CreDtTm', '٢٠٢٥-01-01T10:00:00'),
+    ('//p:NbOfTxs', '４'),
+])
+def test_non_ascii_digits_are_not_ok(xpath, value):
+    tree = parse(build_document())
+    tree.xpath(xpath, namespaces={'p': NS})[0].text = value
+    assert not full_valid(tree)
+    assert fast_check(XSD_PATH, tree) != OK
+
+
+def test_validator_rejects_non_ascii_digits():
+    xml = build_document().replace(b'>10.00</InstdAmt>', '>١٠.00</InstdAmt>'.encode('utf-8'), 1)
+    validator = HVBValidator()
+    assert validator.validate(xml) is False
+    assert validator.checks['xsd_valid']['status'] is False
+
+
+@pytest.mark.parametrize('message', MESSAGES)
+def test_fast_check_never_accepts_invalid_mutations(message):
+    xsd_path = default_registry().get(PREFIX + message).xsd_path
+    mismatches = []
+    accepted = 0
+    for description, tree in mutations(message):
+        if fast_check(xsd_path, tree) == OK:
+            accepted += 1
+            if not full_valid(tree, xsd_path):
+                mismatches.append(description)
+    assert not mismatches
+    # Plausibilität: die Mutationen treffen auch gültige Varianten
+    assert accepted > 0
@@ -0,0 +1,29 @@
+"""Verlauf: Aufbewahrung greift bei jedem Schreiber, nicht nur beim Öffnen"""
+import time
+
+import history
+
+
+def _save(store, i):
+    return store.save(f"hash{i}", f"datei{i}.xml", "HypoVereinsbank", "2.10", 1.0, True, {}, [])
+
+
+def test_save_applies_max_runs(tmp_path):
+    store = history.HistoryStore(str(tmp_path / 'h.sqlite3'), max_runs=5, prune_every=3)
+    for i in range(20):
+        _save(store, i)
+    runs = store.recent(limit=100)
+    # höchstens max_runs plus die seit dem letzten Aufräumen gespeicherten
+    assert len(runs) < 5 + 3
+    assert runs[0]['file_name'] == 'datei19.xml'
+
+
+def test_save_applies_max_age(tmp_path):
+    path = str(tmp_path / 'h.sqlite3')
+    store = history.HistoryStore(path, prune_every=1)
+    old_id = _save(store, 0)
+    with store._connect() as conn:
+        conn.execute("UPDATE runs SET created_at = ? WHERE id = ?", (time.time() - 31 * 86400, old_id))
+    _save(store, 1)
+    assert store.get(old_id) is None
+    assert len(store.recent()) == 1
@@ -0,0 +1,70 @@
+"""Versionen: .03/.09/.12 landen beim passenden Schema, Namespace und Elementnamen"""
+import pytest
+
+import utils
+from validators.fast_xsd import OK, PROBLEM, fast_check
+from validators.hvb_validator_enhanced import HVBValidator
+from validators.schema_registry import default_registry
+
+from .samples import PREFIX, build_document, parse
+
+
+@pytest.mark.parametrize('message,bic,uetr', [
+    ('pain.001.001.03', 'BIC', None),
+    ('pain.001.001.09', 'BICFI', 'UETR'),
+    ('pain.001.001.12', 'BICFI', 'UETR'),
+])
+def test_registry_routes_version(message, bic, uetr):
+    info = default_registry().get(PREFIX + message)
+    assert info is not None
+    assert info.xsd_path.endswith(message + '.xsd')
+    assert info.ns == {'pain': PREFIX + message}
+    assert info.fields == {'bic': bic, 'uetr': uetr}
+    assert message in default_registry().messages()
+
+
+@pytest.mark.parametrize('message', ['pain.001.001.03', 'pain.001.001.12'])
+def test_validator_uses_version_schema(message):
+    xml = build_document(message=message)
+    validator = HVBValidator()
+    assert validator.validate(xml) is True
+    assert validator.message == message
+    assert validator.ns['pain'] == PREFIX + message
+    assert validator.checks['xsd_valid']['status'] is True
+    assert validator.checks['bic_format']['status'] is True
+    # UETR gibt es in .03 nicht - Prüfung entfällt statt falsch zu greifen
+    assert validator.checks['hvb_urgp_uetr']['status'] is (None if message == 'pain.001.001.03' else True)
+
+
+def test_validator_rejects_wrong_version_elements():
+    # .09-Struktur (BICFI, ReqdExctnDt/Dt) unter dem .03-Namespace
+    xml = build_document().replace(b'pain.001.001.09', b'pain.001.001.03')
+    validator = HVBValidator()
+    assert validator.validate(xml) is False
+    assert validator.checks['xsd_valid']['status'] is False
+
+
+@pytest.mark.parametrize('message', ['pain.001.001.03', 'pain.001.001.12'])
+def test_fast_check_on_version(message):
+    xsd_path = default_registry().get(PREFIX + message).xsd_path
+    assert fast_check(xsd_path, parse(build_document(message=message))) == OK
+    # Elementname der jeweils anderen Version
+    other = build_document(message=message).replace(b'<BIC>', b'<BICFI>').replace(b'</BIC>', b'</BICFI>') \
+        if message == 'pain.001.001.03' else build_document(message=message).replace(b'BICFI', b'BIC')
+    assert fast_check(xsd_path, parse(other)) == PROBLEM
+
+
+@pytest.mark.parametrize('message', ['pain.001.001.03', 'pain.001.001.12'])
+def test_parse_payment_data_on_version(message):
+    data = utils.parse_payment_data(build_document(batches=2, txs=3, message=message))
+    assert data is not None
+    assert [b['id'] for b in data['batches']] == ['PMT0', 'PMT1']
+    batch = data['batches'][0]
+    assert batch['bic'] == 'COBADEFFXXX'
+    assert batch['date'] == '2025-01-02'
+    assert [tx['e2e'] for tx in batch['txs']] == ['E2E-0-0', 'E2E-0-1', 'E2E-0-2']
+
+    rows = list(utils.iter_transactions(build_document(batches=2, txs=3, message=message)))
+    assert len(rows) == 6
+    assert rows[0]['batch_date'] == '2025-01-02'
+    assert rows[0]['cdtr_bic'] == '-'
@@ -0,0 +1,36 @@
+"""Sperrliste: Änderungen an der Datei erreichen auch bestehende Validatoren"""
+import os
+
+from validators.hvb_validator_enhanced import HVBValidator
+
+from .samples import build_document
+
+
+def _write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    # mtime-Auflösung mancher Dateisysteme: Änderung sicher sichtbar machen
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_watchlist_change_reaches_existing_validator(tmp_path):
+    path = str(tmp_path / 'watchlist.txt')
+    validator = HVBValidator()
+    validator.watchlist_path = path
+
+    # Noch keine Liste: Prüfung entfällt
+    assert validator.validate(build_document()) is True
+    assert validator.checks['creditor_screening']['status'] is None
+    version_without = validator.ruleset_version
+
+    _write(path, "Beispiel GmbH;REF-1\n")
+    assert validator.validate(build_document()) is True
+    assert validator.checks['creditor_screening']['status'] is True
+    version_first = validator.ruleset_version
+
+    _write(path, "Beispiel GmbH;REF-1\nMax Mustermann;REF-2\n")
+    assert validator.validate(build_document()) is False
+    assert validator.checks['creditor_screening']['status'] is False
+    assert any(e['title'] == "Sperrliste" for e in validator.errors)
+    assert len({version_without, version_first, validator.ruleset_version}) == 3
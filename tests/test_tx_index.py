@@ -0,0 +1,50 @@
+"""Transaktions-Browser: Filter wörtlich und über die Indizes"""
+import pytest
+
+from tx_index import TransactionIndex
+
+
+def _rows():
+    refs = ['E2E%1', 'E2EX1', 'e2e_1', 'E2E\\1', 'ABC-1']
+    for i, e2e in enumerate(refs):
+        yield {'batch_idx': 1, 'batch_id': 'PMT1', 'e2e': e2e, 'amt': '10.00', 'ccy': 'EUR',
+               'cdtr': f'Firma_{i} 100%' if i == 0 else f'Firma{i}', 'cdtr_iban': f'DE0{i}12030000000020205{i}'}
+
+
+def _e2e(index, **filters):
+    rows, total = index.query(**filters)
+    assert total == len(rows)
+    return sorted(r['e2e'] for r in rows)
+
+
+def test_wildcards_are_literal():
+    index = TransactionIndex(_rows())
+    assert _e2e(index, e2e='E2E%') == ['E2E%1']
+    assert _e2e(index, e2e='e2e_') == ['e2e_1']
+    assert _e2e(index, e2e='E2E\\') == ['E2E\\1']
+    assert _e2e(index, e2e='%') == []
+    assert _e2e(index, cdtr='_0 100%') == ['E2E%1']
+    assert _e2e(index, cdtr='%') == ['E2E%1']
+    assert _e2e(index, iban='DE0_') == []
+
+
+def test_prefix_filters_ignore_case():
+    index = TransactionIndex(_rows())
+    assert _e2e(index, e2e='e2e') == ['E2E%1', 'E2EX1', 'E2E\\1', 'e2e_1']
+    assert _e2e(index, iban='de01 1203') == ['E2EX1']
+
+
+@pytest.mark.parametrize('filters,index_name', [
+    ({'e2e': 'E2E_'}, 'idx_txs_e2e'),
+    ({'iban': 'DE01'}, 'idx_txs_iban'),
+])
+def test_prefix_filters_use_index(filters, index_name):
+    index = TransactionIndex(_rows())
+    statements = []
+    index.conn.set_trace_callback(statements.append)
+    index.query(**filters)
+    index.conn.set_trace_callback(None)
+    count_sql = next(s for s in statements if s.startswith('SELECT COUNT'))
+    plan = ' '.join(row[3] for row in index.conn.execute('EXPLAIN QUERY PLAN ' + count_sql))
+    assert index_name in plan
+    assert 'SCAN txs' not in plan
@@ -0,0 +1,150 @@
+import sqlite3
+import threading
+from decimal import Decimal, InvalidOperation
+
+# Anzeigename -> Spalte (nur diese Spalten sind sortierbar)
+SORT_COLUMNS = {
+    'Position': 'pos',
+    'Sammler': 'batch_id',
+    'Empfänger': 'cdtr',
+    'IBAN': 'cdtr_iban',
+    'Betrag': 'amt_cents',
+    'Referenz (E2E)': 'e2e',
+}
+
+# Präfix-Filter (LIKE 'x%') nutzen den Index nur, wenn die Spalte dieselbe
+# Kollation wie LIKE hat (ASCII ohne Groß-/Kleinschreibung) - daher NOCASE
+SCHEMA = """
+CREATE TABLE txs (
+    pos INTEGER PRIMARY KEY,
+    batch_idx INTEGER,
+    batch_id TEXT,
+    e2e TEXT COLLATE NOCASE,
+    instr_id TEXT,
+    amt TEXT,
+    amt_cents INTEGER,
+    ccy TEXT,
+    cdtr TEXT COLLATE NOCASE,
+    cdtr_iban TEXT COLLATE NOCASE,
+    cdtr_bic TEXT,
+    purp TEXT,
+    rmt TEXT
+);
+CREATE INDEX idx_txs_cdtr ON txs (cdtr);
+CREATE INDEX idx_txs_iban ON txs (cdtr_iban);
+CREATE INDEX idx_txs_e2e ON txs (e2e);
+CREATE INDEX idx_txs_amt ON txs (amt_cents);
+CREATE INDEX idx_txs_batch ON txs (batch_idx);
+"""
+
+COLUMNS = ['pos', 'batch_idx', 'batch_id', 'e2e', 'instr_id', 'amt', 'amt_cents', 'ccy',
+           'cdtr', 'cdtr_iban', 'cdtr_bic', 'purp', 'rmt']
+
+
+def _to_cents(amount):
+    try:
+        return int((Decimal(str(amount).strip()) * 100).to_integral_value())
+    except (InvalidOperation, ValueError):
+        return None
+
+
+def _normalize_iban(iban):
+    return (iban or '').replace(' ', '').upper()
+
+
+def _escape_like(text):
+    """Nutzereingabe wörtlich in LIKE verwenden (% und _ sind sonst Platzhalter)"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def iter_batch_rows(data):
+    """Flacht das Ergebnis von utils.parse_payment_data in Index-Zeilen ab"""
+    for batch_idx, batch in enumerate(data['batches'], 1):
+        for tx in batch['txs']:
+            row = dict(tx)
+            row['batch_idx'] = batch_idx
+            row['batch_id'] = batch['id']
+            yield row
+
+
+class TransactionIndex:
+    """
+    In-Memory-Index (SQLite) über die extrahierten Transaktionen. Suche,
+    Filter, Sortierung und Paginierung laufen in SQLite; an die Oberfläche
+    geht nur die jeweils angezeigte Seite.
+    """
+
+    def __init__(self, rows, chunk_size=5000):
+        self.conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        self.conn.executescript(SCHEMA)
+
+        insert = f"INSERT INTO txs ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+        chunk = []
+        for pos, row in enumerate(rows, 1):
+            chunk.append((
+                pos, row.get('batch_idx'), row.get('batch_id'), row.get('e2e'), row.get('instr_id'),
+                row.get('amt'), _to_cents(row.get('amt')), row.get('ccy'), row.get('cdtr'),
+                _normalize_iban(row.get('cdtr_iban')), row.get('cdtr_bic'), row.get('purp'), row.get('rmt')
+            ))
+            if len(chunk) >= chunk_size:
+                self.conn.executemany(insert, chunk)
+                chunk = []
+        if chunk:
+            self.conn.executemany(insert, chunk)
+        self.conn.commit()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM txs").fetchone()[0]
+
+    def query(self, cdtr=None, iban=None, e2e=None, min_amt=None, max_amt=None, batch_idx=None,
+              sort='Position', descending=False, page=1, page_size=50):
+        """
+        Gibt (Zeilen der Seite, Gesamtanzahl Treffer) zurück.
+        cdtr: Teilstring, iban/e2e: Präfix (über Index) - jeweils wörtlich
+        und ohne Groß-/Kleinschreibung;
+        min_amt/max_amt: Betragsgrenzen inklusive.
+        """
+        where, params = [], []
+        if cdtr:
+            where.append("cdtr LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(cdtr)}%")
+        if iban:
+            where.append("cdtr_iban LIKE ? ESCAPE '\\'")
+            params.append(f"{_escape_like(_normalize_iban(iban))}%")
+        if e2e:
+            where.append("e2e LIKE ? ESCAPE '\\'")
+            params.append(f"{_escape_like(e2e)}%")
+        if min_amt is not None:
+            where.append("amt_cents >= ?")
+            params.append(_to_cents(min_amt))
+        if max_amt is not None:
+            where.append("amt_cents <= ?")
+            params.append(_to_cents(max_amt))
+        if batch_idx is not None:
+            where.append("batch_idx = ?")
+            params.append(batch_idx)
+
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+        column = SORT_COLUMNS.get(sort, 'pos')
+        direction = "DESC" if descending else "ASC"
+        offset = max(page - 1, 0) * page_size
+
+        with self.lock:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM txs {clause}", params).fetchone()[0]
+            rows = self.conn.execute(
+                f"SELECT * FROM txs {clause} ORDER BY {column} {direction}, pos LIMIT ? OFFSET ?",
+                params + [page_size, offset]
+            ).fetchall()
+        return [dict(r) for r in rows], total
+
+    def get(self, pos):
+        """Eine Transaktion über ihre Position in der Datei"""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM txs WHERE pos = ?", (pos,)).fetchone()
+        return dict(row) if row else None
+
+    def close(self):
+        self.conn.close()
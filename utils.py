@@ -1,8 +1,11 @@
-import xml.dom.minidom
 from lxml import etree
 import html
+import io
 import re
 
+from validators.delta_cache import fingerprint
+from validators.schema_registry import default_registry, peek_namespace
+
 def render_highlighted_xml(xml_bytes, errors):
     """
     Rendert XML mit Syntax-Highlighting und markiert fehlerhafte Zeilen rot
@@ -10,6 +13,7 @@ def render_highlighted_xml(xml_bytes, errors):
     try:
         xml_str = xml_bytes.decode("utf-8")
         try:
+            import xml.dom.minidom
             dom = xml.dom.minidom.parseString(xml_str)
             pretty_xml = dom.toprettyxml(indent="  ")
         except:
@@ -64,10 +68,13 @@ def render_highlighted_xml(xml_bytes, errors):
         return f"<div style='color: red;'>Rendering-Fehler: {e}</div>"
 
 
-def parse_payment_data(xml_bytes):
+def parse_payment_data(xml_bytes, on_progress=None, cache=None):
     """
-    Parst ISO 20022 pain.001.001.09 XML und extrahiert alle relevanten Daten
-    inklusive zusätzlicher Felder für bessere Visualisierung
+    Parst ISO 20022 pain.001 XML (Version laut Namespace) und extrahiert alle relevanten Daten
+    inklusive zusätzlicher Felder für bessere Visualisierung.
+    on_progress(done, total) wird nach jedem Sammler mit der Anzahl der
+    bisher extrahierten Transaktionen aufgerufen. Mit cache (DeltaCache)
+    werden unveränderte Sammler nicht erneut extrahiert.
     """
     data = {
         'header': {
@@ -82,7 +89,8 @@ def parse_payment_data(xml_bytes):
     
     try:
         root = etree.fromstring(xml_bytes)
-        ns = {'pain': 'urn:iso:std:iso:20022:tech:xsd:pain.001.001.09'}
+        ns = {'pain': etree.QName(root).namespace}
+        fields = default_registry().fields_for(ns['pain'])
         
         # === GROUP HEADER ===
         gh = root.find('pain:GrpHdr', namespaces=ns)
@@ -94,59 +102,22 @@ def parse_payment_data(xml_bytes):
             data['header']['sum'] = gh.findtext('pain:CtrlSum', '-', ns)
 
         # === PAYMENT INFORMATION (Sammler) ===
+        total_txs = int(root.xpath('count(//pain:CdtTrfTxInf)', namespaces=ns)) if on_progress else 0
+        done_txs = 0
         for pmt in root.xpath('//pain:PmtInf', namespaces=ns):
-            # Extrahiere Währung aus erstem InstdAmt falls vorhanden
-            first_amt = pmt.find('.//pain:InstdAmt', namespaces=ns)
-            ccy = first_amt.get("Ccy") if first_amt is not None else "EUR"
-            
-            batch = {
-                'id': pmt.findtext('pain:PmtInfId', '-', ns),
-                'date': pmt.findtext('pain:ReqdExctnDt/pain:Dt', '-', ns) or pmt.findtext('pain:ReqdExctnDt', '-', ns),
-                'dbtr': pmt.findtext('.//pain:Dbtr/pain:Nm', '-', ns),
-                'iban': pmt.findtext('.//pain:DbtrAcct/pain:Id/pain:IBAN', '-', ns),
-                'bic': pmt.findtext('.//pain:DbtrAgt/pain:FinInstnId/pain:BICFI', '-', ns),
-                'ctrl_sum': pmt.findtext('pain:CtrlSum', '-', ns),
-                'nb_of_txs': pmt.findtext('pain:NbOfTxs', '-', ns),
-                'ccy': ccy,
-                'txs': []
-            }
+            key = ('batch', ns['pain'], fingerprint(pmt)) if cache is not None else None
+            batch = cache.get(key) if key is not None else None
+            if batch is None:
+                batch = _extract_batch(pmt, ns, fields)
+                if key is not None:
+                    cache.put(key, batch)
             
-            # === CREDIT TRANSFER TRANSACTIONS ===
-            for tx in pmt.xpath('.//pain:CdtTrfTxInf', namespaces=ns):
-                # Betrag
-                amt_node = tx.find('.//pain:Amt/pain:InstdAmt', namespaces=ns)
-                amt = amt_node.text if amt_node is not None else "0.00"
-                tx_ccy = amt_node.get("Ccy") if amt_node is not None else ccy
-                
-                # Purpose Code
-                purp = tx.findtext('.//pain:Purp/pain:Cd', '-', ns)
-                
-                # Remittance Info - kann mehrere Ustrd haben
-                rmt_info = tx.find('.//pain:RmtInf', namespaces=ns)
-                rmt_text = '-'
-                if rmt_info is not None:
-                    ustrd_list = rmt_info.findall('pain:Ustrd', namespaces=ns)
-                    if ustrd_list:
-                        rmt_text = ' '.join([u.text for u in ustrd_list if u.text])
-                    else:
-                        # Fallback auf direktes findtext
-                        rmt_text = rmt_info.findtext('pain:Ustrd', '-', ns)
-                
-                t = {
-                    'e2e': tx.findtext('pain:PmtId/pain:EndToEndId', '-', ns),
-                    'instr_id': tx.findtext('pain:PmtId/pain:InstrId', '-', ns),
-                    'amt': amt, 
-                    'ccy': tx_ccy,
-                    'cdtr': tx.findtext('.//pain:Cdtr/pain:Nm', '-', ns),
-                    'cdtr_iban': tx.findtext('.//pain:CdtrAcct/pain:Id/pain:IBAN', '-', ns),
-                    'cdtr_bic': tx.findtext('.//pain:CdtrAgt/pain:FinInstnId/pain:BICFI', '-', ns),
-                    'purp': purp if purp != '-' else None,
-                    'rmt': rmt_text if rmt_text != '-' else ''
-                }
-                batch['txs'].append(t)
-                
             data['batches'].append(batch)
             
+            if on_progress is not None:
+                done_txs += len(batch['txs'])
+                on_progress(done_txs, total_txs)
+            
         return data
         
     except Exception as e:
@@ -156,6 +127,116 @@ def parse_payment_data(xml_bytes):
         return None
 
 
+def _extract_batch(pmt, ns, fields):
+    """Extrahiert einen Sammler (PmtInf) inkl. aller Transaktionen"""
+    # Extrahiere Währung aus erstem InstdAmt falls vorhanden
+    first_amt = pmt.find('.//pain:InstdAmt', namespaces=ns)
+    ccy = first_amt.get("Ccy") if first_amt is not None else "EUR"
+    
+    batch = {
+        'id': pmt.findtext('pain:PmtInfId', '-', ns),
+        # .09/.12: ReqdExctnDt/Dt, .03: Datum direkt in ReqdExctnDt
+        'date': pmt.findtext('pain:ReqdExctnDt/pain:Dt', None, ns) or pmt.findtext('pain:ReqdExctnDt', '-', ns),
+        'dbtr': pmt.findtext('.//pain:Dbtr/pain:Nm', '-', ns),
+        'iban': pmt.findtext('.//pain:DbtrAcct/pain:Id/pain:IBAN', '-', ns),
+        'bic': pmt.findtext(f".//pain:DbtrAgt/pain:FinInstnId/pain:{fields['bic']}", '-', ns),
+        'ctrl_sum': pmt.findtext('pain:CtrlSum', '-', ns),
+        'nb_of_txs': pmt.findtext('pain:NbOfTxs', '-', ns),
+        'ccy': ccy,
+        'txs': []
+    }
+    
+    # === CREDIT TRANSFER TRANSACTIONS ===
+    for tx in pmt.xpath('.//pain:CdtTrfTxInf', namespaces=ns):
+        batch['txs'].append(_extract_transaction(tx, ns, fields, ccy))
+    
+    return batch
+
+
+def _extract_transaction(tx, ns, fields, ccy):
+    """Extrahiert die Felder einer CdtTrfTxInf (ccy = Fallback-Währung des Sammlers)"""
+    # Betrag
+    amt_node = tx.find('.//pain:Amt/pain:InstdAmt', namespaces=ns)
+    amt = amt_node.text if amt_node is not None else "0.00"
+    tx_ccy = amt_node.get("Ccy") if amt_node is not None else ccy
+    
+    # Purpose Code
+    purp = tx.findtext('.//pain:Purp/pain:Cd', '-', ns)
+    
+    # Remittance Info - kann mehrere Ustrd haben
+    rmt_info = tx.find('.//pain:RmtInf', namespaces=ns)
+    rmt_text = '-'
+    if rmt_info is not None:
+        ustrd_list = rmt_info.findall('pain:Ustrd', namespaces=ns)
+        if ustrd_list:
+            rmt_text = ' '.join([u.text for u in ustrd_list if u.text])
+        else:
+            # Fallback auf direktes findtext
+            rmt_text = rmt_info.findtext('pain:Ustrd', '-', ns)
+    
+    return {
+        'e2e': tx.findtext('pain:PmtId/pain:EndToEndId', '-', ns),
+        'instr_id': tx.findtext('pain:PmtId/pain:InstrId', '-', ns),
+        'amt': amt, 
+        'ccy': tx_ccy,
+        'cdtr': tx.findtext('.//pain:Cdtr/pain:Nm', '-', ns),
+        'cdtr_iban': tx.findtext('.//pain:CdtrAcct/pain:Id/pain:IBAN', '-', ns),
+        'cdtr_bic': tx.findtext(f".//pain:CdtrAgt/pain:FinInstnId/pain:{fields['bic']}", '-', ns),
+        'purp': purp if purp != '-' else None,
+        'rmt': rmt_text if rmt_text != '-' else ''
+    }
+
+
+def iter_transactions(xml_source):
+    """
+    Liefert alle Transaktionen als flache Zeilen (inkl. Sammler-Daten),
+    ohne den Baum komplett im Speicher aufzubauen. xml_source sind Bytes
+    oder ein lesbarer Stream.
+    """
+    namespace, xml_source = peek_namespace(xml_source)
+    ns = {'pain': namespace or default_registry().default.namespace}
+    fields = default_registry().fields_for(ns['pain'])
+    pain = '{%s}' % ns['pain']
+    if isinstance(xml_source, (bytes, bytearray)):
+        xml_source = io.BytesIO(xml_source)
+    
+    batch = {}
+    for event, elem in etree.iterparse(xml_source, events=('start', 'end')):
+        if elem.tag == pain + 'PmtInf':
+            if event == 'start':
+                batch = {'batch_id': '-', 'batch_date': '-', 'dbtr': '-', 'dbtr_iban': '-', 'ccy': 'EUR'}
+            else:
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+            continue
+        if event != 'end':
+            continue
+        
+        parent = elem.getparent()
+        if parent is None or parent.tag != pain + 'PmtInf':
+            continue
+        
+        # Sammler-Kopf steht im Schema vor den Transaktionen
+        if elem.tag == pain + 'PmtInfId':
+            batch['batch_id'] = elem.text or '-'
+        elif elem.tag == pain + 'ReqdExctnDt':
+            batch['batch_date'] = elem.findtext('pain:Dt', None, ns) or elem.text or '-'
+        elif elem.tag == pain + 'Dbtr':
+            batch['dbtr'] = elem.findtext('pain:Nm', '-', ns)
+        elif elem.tag == pain + 'DbtrAcct':
+            batch['dbtr_iban'] = elem.findtext('pain:Id/pain:IBAN', '-', ns)
+        elif elem.tag == pain + 'CdtTrfTxInf':
+            row = {k: v for k, v in batch.items() if k != 'ccy'}
+            row.update(_extract_transaction(elem, ns, fields, batch['ccy']))
+            yield row
+            
+            # Bereits verarbeitete Transaktionen freigeben
+            elem.clear()
+            while elem.getprevious() is not None:
+                del parent[0]
+
+
 def format_amount(amount_str, currency="EUR"):
     """
     Formatiert Beträge für bessere Lesbarkeit
@@ -0,0 +1,160 @@
+import gzip
+import io
+import os
+import posixpath
+import zipfile
+
+from .base_validator_enhanced import ValidationCancelled
+
+ARCHIVE_EXTENSIONS = ('.zip', '.gz')
+
+# Grenzen gegen Zip-Bomben: Anzahl Dateien und entpackte Größe (Bytes)
+MAX_MEMBERS = int(os.environ.get("ISO_VALIDATOR_ARCHIVE_MAX_MEMBERS", 1000))
+MAX_MEMBER_SIZE = int(os.environ.get("ISO_VALIDATOR_ARCHIVE_MAX_MEMBER_SIZE", 256 * 1024 * 1024))
+MAX_TOTAL_SIZE = int(os.environ.get("ISO_VALIDATOR_ARCHIVE_MAX_TOTAL_SIZE", 1024 * 1024 * 1024))
+
+
+def _size(n):
+    return f"{n / (1024 * 1024):.0f} MB" if n >= 1024 * 1024 else f"{n} Bytes"
+
+
+class ArchiveLimitExceeded(ValueError):
+    """Archiv überschreitet MAX_MEMBERS, MAX_MEMBER_SIZE oder MAX_TOTAL_SIZE"""
+
+
+class LimitedReader:
+    """
+    Stream, der nach max_size entpackten Bytes abbricht. zipfile liefert
+    höchstens die im Verzeichnis angegebene Größe, .gz hat gar keine
+    verlässliche Angabe - dort greift nur diese Zählung beim Lesen.
+    """
+
+    def __init__(self, stream, member, max_size=None):
+        self.stream = stream
+        self.member = member
+        self.max_size = MAX_MEMBER_SIZE if max_size is None else max_size
+        self.size = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.max_size - self.size + 1:
+            # ein Byte über der Grenze genügt, um sie zu erkennen
+            size = self.max_size - self.size + 1
+        data = self.stream.read(size)
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise ArchiveLimitExceeded(
+                f"{self.member}: entpackt größer als {_size(self.max_size)}"
+            )
+        return data
+
+    def close(self):
+        self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_archive(filename):
+    """Prüft anhand der Dateiendung, ob es sich um ein ZIP/GZIP-Archiv handelt"""
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def is_resource_fork(name):
+    """macOS-Metadaten im ZIP (__MACOSX/..., ._datei.xml) - keine Zahlungsdateien"""
+    return name.startswith('__MACOSX/') or posixpath.basename(name).startswith('._')
+
+
+def list_members(filename, data):
+    """
+    Listet die Zahlungsdateien (XML) eines Archivs in Archiv-Reihenfolge auf.
+    Bei .gz enthält das Archiv genau eine Datei (Name ohne .gz). Zu viele
+    Dateien oder eine zu große angegebene Gesamtgröße lösen
+    ArchiveLimitExceeded aus, bevor etwas entpackt wird.
+    """
+    if filename.lower().endswith('.gz'):
+        return [filename[:-3]]
+
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        infos = [
+            info for info in zf.infolist()
+            if not info.is_dir() and info.filename.lower().endswith('.xml')
+            and not is_resource_fork(info.filename)
+        ]
+    if len(infos) > MAX_MEMBERS:
+        raise ArchiveLimitExceeded(f"Archiv enthält {len(infos)} Dateien (erlaubt: {MAX_MEMBERS})")
+    total = sum(info.file_size for info in infos)
+    if total > MAX_TOTAL_SIZE:
+        raise ArchiveLimitExceeded(
+            f"Archiv entpackt {_size(total)} (erlaubt: {_size(MAX_TOTAL_SIZE)})"
+        )
+    return [info.filename for info in infos]
+
+
+def open_member(filename, data, member):
+    """
+    Öffnet ein Archiv-Member als Stream. Es wird nur im Speicher entpackt,
+    nichts landet auf der Platte. Mehr als MAX_MEMBER_SIZE entpackte Bytes
+    lösen beim Lesen ArchiveLimitExceeded aus. Der Aufrufer muss den Stream
+    schließen.
+    """
+    if filename.lower().endswith('.gz'):
+        return LimitedReader(gzip.GzipFile(fileobj=io.BytesIO(data)), member)
+
+    zf = zipfile.ZipFile(io.BytesIO(data))
+    info = zf.getinfo(member)
+    if info.file_size > MAX_MEMBER_SIZE:
+        raise ArchiveLimitExceeded(
+            f"{member}: entpackt {_size(info.file_size)} (erlaubt: {_size(MAX_MEMBER_SIZE)})"
+        )
+    return LimitedReader(zf.open(info), member)
+
+
+def read_member(filename, data, member):
+    """Liest ein einzelnes Member komplett (für die Detailansicht, höchstens MAX_MEMBER_SIZE)"""
+    with open_member(filename, data, member) as stream:
+        return stream.read()
+
+
+def validate_archive(filename, data, validator_factory, on_member=None, cancel_event=None):
+    """
+    Validiert alle Zahlungsdateien eines Archivs nacheinander.
+
+    Parsen und Prüfen halten das GIL - Threads wären hier langsamer als ein
+    Durchlauf nacheinander. validator_factory erzeugt pro Member einen
+    frischen Validator (Validatoren halten Zustand). on_member(done, total,
+    member, validator) wird vor jedem Member aufgerufen; ist cancel_event gesetzt,
+    bricht die Prüfung mit ValidationCancelled ab. Ergebnis ist eine Liste
+    in Archiv-Reihenfolge mit {'member', 'valid', 'validator'}.
+    """
+    members = list_members(filename, data)
+    results = []
+    for done, member in enumerate(members):
+        if cancel_event is not None and cancel_event.is_set():
+            raise ValidationCancelled()
+        validator = validator_factory()
+        validator.cancel_event = cancel_event
+        if on_member is not None:
+            on_member(done, len(members), member, validator)
+        try:
+            with open_member(filename, data, member) as stream:
+                valid = validator.validate(stream)
+        except ValidationCancelled:
+            raise
+        except Exception as e:
+            # Defektes Member (z.B. CRC-Fehler) - als kritischer Fehler melden
+            validator.checks['xml_wellformed']['status'] = False
+            validator.add_finding({
+                "line": 0,
+                "tag": "System",
+                "level": "CRITICAL",
+                "title": "Archiv Fehler",
+                "msg": f"Datei konnte nicht entpackt werden: {str(e)}"
+            })
+            valid = False
+        finally:
+            validator.cancel_event = None
+        results.append({'member': member, 'valid': valid, 'validator': validator})
+    return results
@@ -1,11 +1,30 @@
-import xmlschema
 from lxml import etree
-import io
+from decimal import Decimal, InvalidOperation
+import copy
+import hashlib
 import re
 
+from .delta_cache import fingerprint
+from .fast_xsd import OK as FAST_OK, fast_check
+from .screening import DEFAULT_WATCHLIST_PATH, get_watchlist
+
+from .schema_registry import default_registry, get_schema, peek_namespace, warm_up  # noqa: F401 (Re-Export)
+
+class ValidationCancelled(Exception):
+    """Wird geworfen, wenn ein laufender validate()-Aufruf abgebrochen wurde"""
+
+
 class BaseValidator:
-    def __init__(self, xsd_path):
-        self.xsd_path = xsd_path
+    # Version des Regelwerks - bei jeder Regeländerung erhöhen, damit
+    # gespeicherte Ergebnisse (Verlauf) nicht mehr wiederverwendet werden
+    RULESET_VERSION = "2.10"
+    
+    def __init__(self, xsd_path=None, registry=None):
+        # Das Schema wird pro Datei anhand des Namespace aus der Registry
+        # gewählt; xsd_path ist nur der Fallback ohne erkennbaren Namespace.
+        self.registry = registry or default_registry()
+        self.xsd_path = xsd_path or self.registry.default.xsd_path
+        self.message = None
         self.errors = []
         self.checks = {
             'xsd_valid': {'status': None, 'name': 'XSD Schema', 'level': 'technical'},
@@ -18,36 +37,108 @@ class BaseValidator:
             'reference_length': {'status': None, 'name': 'Referenz-Längen', 'level': 'sepa'},
             'service_level': {'status': None, 'name': 'Service Level', 'level': 'sepa'},
             'amount_limits': {'status': None, 'name': 'Betragslimits', 'level': 'sepa'},
+            'control_sums': {'status': None, 'name': 'Kontrollsummen (NbOfTxs/CtrlSum)', 'level': 'sepa'},
+            'creditor_screening': {'status': None, 'name': 'Sperrliste (Empfängername)', 'level': 'compliance'},
         }
         self.ns = {'pain': 'urn:iso:std:iso:20022:tech:xsd:pain.001.001.09'}
+        self.fields = self.registry.fields_for(self.ns['pain'])
+        
+        # Findings können zusätzlich zur Liste self.errors sofort an einen
+        # Abnehmer (z.B. Report-Export) gereicht werden. Mit
+        # collect_errors=False bleibt der Speicherbedarf konstant.
+        self.on_finding = None
+        self.collect_errors = True
+        self.error_count = 0
+        
+        # Fortschritt: on_progress(stage, done, total) nach jeder Stufe/Regel.
+        # Ist cancel_event (threading.Event) gesetzt, bricht validate() an der
+        # nächsten Regelgrenze mit ValidationCancelled ab.
+        self.on_progress = None
+        self.cancel_event = None
+        
+        # Optionaler DeltaCache: Regel-Ergebnisse pro GrpHdr/PmtInf-Teilbaum
+        # werden über deren Fingerprint wiederverwendet
+        self.delta_cache = None
+        
+        # Schnelltest (Struktur + Facetten aus der XSD) vor xmlschema
+        self.fast_xsd = True
+        
+        # Sperrliste für den Empfänger-Abgleich (None = Prüfung entfällt).
+        # validate() holt den aktuellen Stand der Datei, damit langlebige
+        # Validatoren (Watcher-Worker) Änderungen an der Liste sehen.
+        self.watchlist_path = DEFAULT_WATCHLIST_PATH
+        self.watchlist = get_watchlist(self.watchlist_path)
+        self._scope = None
+        self._scope_line = 0
+        self._merged_checks = {}
     
     def get_profile_info(self):
         return "Basis", "Standard ISO 20022 Validierung"
     
+    @property
+    def ruleset_version(self):
+        """
+        RULESET_VERSION plus Stand der Sperrliste - Schlüssel für gespeicherte
+        Ergebnisse, damit eine geänderte Liste nicht auf alte Treffer fällt
+        """
+        if self.watchlist is None:
+            return self.RULESET_VERSION
+        return f"{self.RULESET_VERSION}+wl.{self.watchlist.fingerprint[:12]}"
+    
     def get_checks_summary(self):
         """Gibt Zusammenfassung der Checks zurück für UI"""
         technical = [c for c in self.checks.values() if c['level'] == 'technical']
         sepa = [c for c in self.checks.values() if c['level'] == 'sepa']
         bank = [c for c in self.checks.values() if c['level'] == 'bank']
+        compliance = [c for c in self.checks.values() if c['level'] == 'compliance']
         
         return {
             'technical': technical,
             'sepa': sepa,
-            'bank': bank
+            'bank': bank,
+            'compliance': compliance
         }
     
     def validate(self, xml_content):
+        """
+        Validiert eine Zahlungsdatei. xml_content sind entweder die Bytes der
+        Datei oder ein lesbarer Stream (z.B. ein Archiv-Member), der direkt
+        in den Parser gelesen wird.
+        """
         self.errors = []
+        self.error_count = 0
         tree = None
+        for check in self.checks.values():
+            check['status'] = None
+        # Nur ein stat(), solange sich die Datei nicht geändert hat
+        self.watchlist = get_watchlist(self.watchlist_path)
+        
+        # 0. Nachrichtenversion aus den ersten Bytes bestimmen
+        namespace, xml_content = peek_namespace(xml_content)
+        xsd_path = self._select_schema(namespace)
+        if xsd_path is None:
+            self.checks['xsd_valid']['status'] = False
+            self.add_finding({
+                "line": 0, 
+                "tag": "Document", 
+                "level": "CRITICAL", 
+                "title": "Nachrichtenversion", 
+                "msg": f"Nicht unterstützte Nachrichtenversion: {namespace} "
+                       f"(Unterstützt: {', '.join(self.registry.messages())})"
+            })
+            return False
         
         # 1. XML Wellformed Check
         try:
             parser = etree.XMLParser(remove_blank_text=True)
-            tree = etree.fromstring(xml_content, parser)
+            if hasattr(xml_content, 'read'):
+                tree = etree.parse(xml_content, parser).getroot()
+            else:
+                tree = etree.fromstring(xml_content, parser)
             self.checks['xml_wellformed']['status'] = True
         except Exception as e:
             self.checks['xml_wellformed']['status'] = False
-            self.errors.append({
+            self.add_finding({
                 "line": 0, 
                 "tag": "XML", 
                 "level": "CRITICAL", 
@@ -56,25 +147,27 @@ class BaseValidator:
             })
             return False
         
-        # 2. XSD Schema Validation
+        self._progress('parse', 1, 1)
+        
+        # 2. XSD Schema Validation (gegen den bereits geparsten Baum, ein Durchlauf).
+        # Zuerst der aus der XSD abgeleitete Schnelltest; xmlschema läuft nur,
+        # wenn dieser ein Problem oder ein nicht abgebildetes Konstrukt meldet.
         try:
-            schema = xmlschema.XMLSchema(self.xsd_path)
-            if schema.is_valid(io.BytesIO(xml_content)):
-                self.checks['xsd_valid']['status'] = True
+            self.checks['xsd_valid']['status'] = True
+            if self.fast_xsd and fast_check(xsd_path, tree) == FAST_OK:
+                xsd_findings = []
+            elif self.delta_cache is not None:
+                schema = get_schema(xsd_path)
+                xsd_findings = self._xsd_findings_delta(schema, tree, xsd_path)
             else:
+                schema = get_schema(xsd_path)
+                xsd_findings = self._xsd_findings(schema, tree)
+            for finding in xsd_findings:
                 self.checks['xsd_valid']['status'] = False
-                for error in schema.iter_errors(io.BytesIO(xml_content)):
-                    tag, msg = self._translate_xsd_error(error)
-                    self.errors.append({
-                        "line": 1, 
-                        "tag": tag, 
-                        "level": "CRITICAL", 
-                        "title": "Schema-Fehler", 
-                        "msg": msg
-                    })
+                self.add_finding(finding)
         except Exception as e:
             self.checks['xsd_valid']['status'] = False
-            self.errors.append({
+            self.add_finding({
                 "line": 0, 
                 "tag": "System", 
                 "level": "CRITICAL", 
@@ -83,15 +176,283 @@ class BaseValidator:
             })
             return False
         
-        # 3. SEPA Standard Checks (nur wenn XSD OK)
-        if tree is not None and self.checks['xsd_valid']['status']:
-            self._check_sepa_standard(tree)
-        
-        # 4. Business Rules (überschreibbar in Subklassen)
-        if tree is not None:
-            self._check_business_rules(tree)
-        
-        return len([e for e in self.errors if e['level'] in ['CRITICAL', 'ERROR']]) == 0
+        self._progress('xsd', 1, 1)
+        
+        # 3./4. SEPA Standard Checks (nur wenn XSD OK) und Business Rules
+        # (überschreibbar in Subklassen) - je Teilbaum GrpHdr / PmtInf, damit
+        # unveränderte Sammler aus dem Delta-Cache übernommen werden können
+        sepa_enabled = bool(self.checks['xsd_valid']['status'])
+        scopes = tree.xpath(
+            'pain:CstmrCdtTrfInitn/pain:GrpHdr | pain:CstmrCdtTrfInitn/pain:PmtInf', namespaces=self.ns
+        ) or [tree]
+        total_txs = int(tree.xpath('count(.//pain:CdtTrfTxInf)', namespaces=self.ns))
+        
+        scope_results = []
+        self._merged_checks = {}
+        done_txs = 0
+        for scope in scopes:
+            result = self._check_scope(scope, sepa_enabled)
+            scope_results.append(result)
+            self._merge_scope_checks(result)
+            done_txs += result['tx_count']
+            self._progress('rules', done_txs, total_txs)
+        
+        # 5. Dateiübergreifend: GrpHdr-Summen (immer neu, nur Aggregation)
+        if sepa_enabled:
+            self._check_group_totals(tree, scope_results)
+        
+        # 6. Empfängernamen gegen die Sperrliste (bankunabhängig, ein Durchlauf)
+        self._check_screening(tree)
+        
+        self._progress('done', 1, 1)
+        return self.error_count == 0
+    
+    def _select_schema(self, namespace):
+        """
+        Setzt Namespace-Map und Elementnamen für die erkannte Version und gibt
+        den XSD-Pfad zurück (None = Version nicht unterstützt).
+        """
+        info = self.registry.get(namespace) if namespace else None
+        if info is None and namespace and namespace.startswith('urn:iso:std:iso:20022:tech:xsd:pain.001'):
+            return None
+        
+        if info is None:
+            # Kein pain.001-Namespace erkennbar - Fallback auf xsd_path,
+            # die XSD-Prüfung meldet dann den eigentlichen Fehler
+            return self.xsd_path
+        
+        self.message = info.message
+        self.ns = info.ns
+        self.fields = info.fields
+        return info.xsd_path
+    
+    def _xsd_findings(self, schema, tree):
+        """XSD-Fehler als Findings"""
+        for finding, _elem in self._xsd_findings_with_elem(schema, tree):
+            yield finding
+    
+    def _xsd_findings_delta(self, schema, tree, xsd_path):
+        """
+        XSD-Prüfung mit Delta-Cache: validiert wird ein reduziertes Dokument
+        aus GrpHdr und nur den geänderten PmtInf; die Findings unveränderter
+        Sammler kommen aus dem Cache (Zeilen relativ zum PmtInf).
+        """
+        parent = tree.find('pain:CstmrCdtTrfInitn', self.ns)
+        pmts = parent.findall('pain:PmtInf', self.ns) if parent is not None else []
+        if not pmts:
+            yield from self._xsd_findings(schema, tree)
+            return
+        
+        keys = [('xsd', xsd_path, fingerprint(pmt), self._line_layout(pmt)) for pmt in pmts]
+        cached = [self.delta_cache.get(key) for key in keys]
+        # Mindestens ein PmtInf muss enthalten sein (minOccurs=1)
+        included = [i for i, c in enumerate(cached) if c is None] or [0]
+        
+        reduced_root = etree.Element(tree.tag, attrib=dict(tree.attrib), nsmap=tree.nsmap)
+        reduced_root.sourceline = tree.sourceline
+        reduced_parent = etree.SubElement(reduced_root, parent.tag, attrib=dict(parent.attrib))
+        reduced_parent.sourceline = parent.sourceline
+        pmt_index = {id(pmt): i for i, pmt in enumerate(pmts)}
+        origin = []
+        for child in parent:
+            i = pmt_index.get(id(child))
+            if i is not None and i not in included:
+                continue
+            reduced_parent.append(copy.deepcopy(child))
+            origin.append(i)
+        
+        fresh = {i: [] for i in included}
+        for finding, elem in self._xsd_findings_with_elem(schema, reduced_root):
+            # Finding dem PmtInf zuordnen, in dem es liegt
+            i = None
+            while elem is not None and elem.getparent() is not None:
+                if elem.getparent() is reduced_parent:
+                    i = origin[reduced_parent.index(elem)]
+                    break
+                elem = elem.getparent()
+            if i is None:
+                yield finding
+            else:
+                fresh[i].append(dict(finding, line=finding['line'] - (pmts[i].sourceline or 0)))
+        
+        for i, pmt in enumerate(pmts):
+            findings = cached[i] if cached[i] is not None else fresh[i]
+            if cached[i] is None:
+                self.delta_cache.put(keys[i], findings)
+            for finding in findings:
+                yield dict(finding, line=finding['line'] + (pmt.sourceline or 0))
+    
+    def _xsd_findings_with_elem(self, schema, tree):
+        for error in schema.iter_errors(tree):
+            tag, msg = self._translate_xsd_error(error)
+            yield {
+                "line": getattr(error, 'sourceline', None) or 1, 
+                "tag": tag, 
+                "level": "CRITICAL", 
+                "title": "Schema-Fehler", 
+                "msg": msg
+            }, getattr(error, 'elem', None)
+    
+    def _line_layout(self, node):
+        """
+        Hash der Zeilen aller Elemente relativ zum Teilbaum - Teil des Cache-
+        Schlüssels, weil der Fingerprint die Formatierung nicht sieht
+        (remove_blank_text) und sonst zwischengespeicherte Findings mit
+        falschen Zeilennummern zurückkämen
+        """
+        start = node.sourceline or 0
+        offsets = ','.join(str((elem.sourceline or start) - start) for elem in node.iter())
+        return hashlib.sha1(offsets.encode('ascii')).hexdigest()
+    
+    def _check_scope(self, scope, sepa_enabled):
+        """
+        Führt SEPA- und Bankregeln auf einem Teilbaum aus. Ergebnis: Check-
+        Status, Findings (Zeilen relativ zum Teilbaum) sowie Anzahl und
+        Summe der Transaktionen für die GrpHdr-Prüfung.
+        """
+        key = None
+        if self.delta_cache is not None:
+            key = ('rules', type(self).__name__, self.ruleset_version, self.message,
+                   sepa_enabled, fingerprint(scope), self._line_layout(scope))
+            cached = self.delta_cache.get(key)
+            if cached is not None:
+                for finding in cached['findings']:
+                    self.add_finding(dict(finding, line=finding['line'] + (scope.sourceline or 0)))
+                return cached
+        
+        result = {'checks': {}, 'findings': [], 'tx_count': 0, 'amount_sum': '0'}
+        self._scope = result
+        self._scope_line = scope.sourceline or 0
+        try:
+            if sepa_enabled:
+                self._check_sepa_standard(scope)
+            self._check_business_rules(scope)
+        finally:
+            self._scope = None
+        
+        tx_count, amount_sum = self._sum_transactions(scope)
+        result['tx_count'] = tx_count
+        result['amount_sum'] = str(amount_sum)
+        
+        if key is not None:
+            self.delta_cache.put(key, result)
+        return result
+    
+    def _combine_status(self, check_id, status):
+        """
+        Status eines Checks über alle bisherigen Teilbäume plus status:
+        Fehlschlag gewinnt, dann 'nicht durchgeführt'
+        """
+        merged = self._merged_checks.get(check_id, True)
+        if merged is False or status is False:
+            return False
+        return status if merged is True else merged
+    
+    def _merge_scope_checks(self, result):
+        """Übernimmt den Check-Status eines abgeschlossenen Teilbaums"""
+        for check_id, status in result['checks'].items():
+            self._merged_checks[check_id] = self._combine_status(check_id, status)
+            self.checks[check_id]['status'] = self._merged_checks[check_id]
+    
+    def _set_check(self, check_id, status):
+        """
+        Setzt den Status eines Checks. Im Teilbaum wird er für den Delta-Cache
+        gemerkt und sofort mit den bisherigen Teilbäumen verrechnet
+        veröffentlicht, damit die Fortschrittsanzeige Teilergebnisse zeigt.
+        """
+        if self._scope is not None:
+            self._scope['checks'][check_id] = status
+            self.checks[check_id]['status'] = self._combine_status(check_id, status)
+        else:
+            self.checks[check_id]['status'] = status
+    
+    def _payment_infos(self, node):
+        """Alle PmtInf im Teilbaum (inkl. node selbst)"""
+        if etree.QName(node).localname == 'PmtInf':
+            return [node]
+        return node.xpath('.//pain:PmtInf', namespaces=self.ns)
+    
+    def _sum_transactions(self, node):
+        """Anzahl und Summe der Transaktionsbeträge im Teilbaum"""
+        amounts = node.xpath(
+            './/pain:CdtTrfTxInf/pain:Amt/pain:InstdAmt | .//pain:CdtTrfTxInf/pain:Amt/pain:EqvtAmt/pain:Amt',
+            namespaces=self.ns
+        )
+        total = Decimal(0)
+        for amt in amounts:
+            try:
+                total += Decimal(amt.text.strip() if amt.text else "0")
+            except InvalidOperation:
+                pass
+        return len(amounts), total
+    
+    def _check_group_totals(self, tree, scope_results):
+        """NbOfTxs/CtrlSum im GrpHdr gegen die Summe aller Sammler"""
+        totals_ok = True
+        gh = tree.find('pain:CstmrCdtTrfInitn/pain:GrpHdr', self.ns)
+        if gh is not None:
+            tx_count = sum(r['tx_count'] for r in scope_results)
+            amount_sum = sum((Decimal(r['amount_sum']) for r in scope_results), Decimal(0))
+            totals_ok = self._compare_control_values(gh, tx_count, amount_sum, "GrpHdr")
+        
+        if self.checks['control_sums']['status'] is not False:
+            self.checks['control_sums']['status'] = totals_ok
+    
+    def _compare_control_values(self, node, tx_count, amount_sum, label):
+        """Vergleicht NbOfTxs/CtrlSum eines Knotens mit den Ist-Werten"""
+        ok = True
+        nb = node.find('pain:NbOfTxs', self.ns)
+        if nb is not None and (nb.text or '').strip() != str(tx_count):
+            ok = False
+            self.add_error(
+                nb, 
+                "ERROR", 
+                "Anzahl Transaktionen", 
+                f"{label}: NbOfTxs = {nb.text}, tatsächlich {tx_count} Transaktionen"
+            )
+        
+        ctrl = node.find('pain:CtrlSum', self.ns)
+        if ctrl is not None:
+            try:
+                declared = Decimal(ctrl.text.strip() if ctrl.text else "0")
+            except InvalidOperation:
+                declared = None
+            if declared != amount_sum:
+                ok = False
+                self.add_error(
+                    ctrl, 
+                    "ERROR", 
+                    "Kontrollsumme", 
+                    f"{label}: CtrlSum = {ctrl.text}, Summe der Beträge {amount_sum:.2f}"
+                )
+        return ok
+    
+    def _check_screening(self, tree):
+        """Cdtr/Nm aller Transaktionen gegen die Sperrliste"""
+        if self.watchlist is None:
+            self.checks['creditor_screening']['status'] = None
+            return
+        
+        names = tree.xpath('.//pain:CdtTrfTxInf/pain:Cdtr/pain:Nm', namespaces=self.ns)
+        screening_ok = True
+        for i, name, hits in self.watchlist.screen(nm.text or '' for nm in names):
+            screening_ok = False
+            entries = ', '.join(f"{entry} ({ref})" if ref else entry for entry, ref in hits)
+            self.add_error(
+                names[i], 
+                "ERROR", 
+                "Sperrliste", 
+                f"Empfänger '{name.strip()}' entspricht Sperrlisten-Eintrag: {entries}"
+            )
+        
+        self.checks['creditor_screening']['status'] = screening_ok
+    
+    def _progress(self, stage, done, total):
+        """Meldet Fortschritt und prüft auf Abbruch"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ValidationCancelled()
+        if self.on_progress is not None:
+            self.on_progress(stage, done, total)
     
     def _check_sepa_standard(self, tree):
         """SEPA Standard Checks - Generisch für alle Banken"""
@@ -99,7 +460,7 @@ class BaseValidator:
         # 1. Währung Check - Nur EUR erlaubt
         currency_ok = True
         non_eur_found = []
-        for amt in tree.xpath('//pain:InstdAmt[@Ccy]', namespaces=self.ns):
+        for amt in tree.xpath('.//pain:InstdAmt[@Ccy]', namespaces=self.ns):
             ccy = amt.get('Ccy')
             if ccy != 'EUR':
                 currency_ok = False
@@ -111,11 +472,12 @@ class BaseValidator:
                     f"SEPA erlaubt nur EUR, gefunden: {ccy}"
                 )
         
-        self.checks['sepa_currency']['status'] = currency_ok
+        self._set_check('sepa_currency', currency_ok)
+        self._progress('sepa', 1, 9)
         
         # 2. IBAN Format Check
         iban_ok = True
-        for iban_elem in tree.xpath('//pain:IBAN', namespaces=self.ns):
+        for iban_elem in tree.xpath('.//pain:IBAN', namespaces=self.ns):
             iban = iban_elem.text.strip() if iban_elem.text else ""
             if not self._validate_iban_format(iban):
                 iban_ok = False
@@ -126,11 +488,12 @@ class BaseValidator:
                     f"IBAN Format ungültig: {iban}"
                 )
         
-        self.checks['iban_format']['status'] = iban_ok
+        self._set_check('iban_format', iban_ok)
+        self._progress('sepa', 2, 9)
         
         # 3. BIC Format Check
         bic_ok = True
-        for bic_elem in tree.xpath('//pain:BICFI', namespaces=self.ns):
+        for bic_elem in tree.xpath(f".//pain:{self.fields['bic']}", namespaces=self.ns):
             bic = bic_elem.text.strip() if bic_elem.text else ""
             if not self._validate_bic_format(bic):
                 bic_ok = False
@@ -141,11 +504,12 @@ class BaseValidator:
                     f"BIC Format ungültig: {bic}"
                 )
         
-        self.checks['bic_format']['status'] = bic_ok
+        self._set_check('bic_format', bic_ok)
+        self._progress('sepa', 3, 9)
         
         # 4. Beträge > 0
         amount_ok = True
-        for amt in tree.xpath('//pain:InstdAmt', namespaces=self.ns):
+        for amt in tree.xpath('.//pain:InstdAmt', namespaces=self.ns):
             try:
                 value = float(amt.text.strip() if amt.text else "0")
                 if value <= 0:
@@ -165,13 +529,14 @@ class BaseValidator:
                     f"Betrag ist keine Zahl: {amt.text}"
                 )
         
-        self.checks['amount_positive']['status'] = amount_ok
+        self._set_check('amount_positive', amount_ok)
+        self._progress('sepa', 4, 9)
         
         # 5. SEPA Zeichensatz (Latin-1 Basic + Erweiterungen)
         charset_ok = True
         sepa_pattern = re.compile(r'^[a-zA-Z0-9/?:().,\'+ \-]*$')
         
-        for text_field in tree.xpath('//pain:Ustrd | //pain:EndToEndId | //pain:PmtInfId', namespaces=self.ns):
+        for text_field in tree.xpath('.//pain:Ustrd | .//pain:EndToEndId | .//pain:PmtInfId', namespaces=self.ns):
             text = text_field.text.strip() if text_field.text else ""
             if text and not sepa_pattern.match(text):
                 charset_ok = False
@@ -183,11 +548,12 @@ class BaseValidator:
                     f"Ungültige Zeichen: {invalid_chars} in '{text[:30]}...'"
                 )
         
-        self.checks['sepa_charset']['status'] = charset_ok
+        self._set_check('sepa_charset', charset_ok)
+        self._progress('sepa', 5, 9)
         
         # 6. Referenz-Längen (Max 35 Zeichen)
         ref_ok = True
-        for ref in tree.xpath('//pain:EndToEndId | //pain:PmtInfId | //pain:MsgId', namespaces=self.ns):
+        for ref in tree.xpath('.//pain:EndToEndId | .//pain:PmtInfId | .//pain:MsgId', namespaces=self.ns):
             text = ref.text.strip() if ref.text else ""
             if len(text) > 35:
                 ref_ok = False
@@ -198,13 +564,14 @@ class BaseValidator:
                     f"Max. 35 Zeichen erlaubt, gefunden: {len(text)} ('{text[:40]}...')"
                 )
         
-        self.checks['reference_length']['status'] = ref_ok
+        self._set_check('reference_length', ref_ok)
+        self._progress('sepa', 6, 9)
         
         # 7. Service Level Check
         svc_ok = True
         valid_service_levels = ['SEPA', 'URGP', 'SDVA', 'NURG']
         
-        for svc in tree.xpath('//pain:SvcLvl/pain:Cd', namespaces=self.ns):
+        for svc in tree.xpath('.//pain:SvcLvl/pain:Cd', namespaces=self.ns):
             code = svc.text.strip() if svc.text else ""
             if code and code not in valid_service_levels:
                 svc_ok = False
@@ -215,11 +582,12 @@ class BaseValidator:
                     f"Unbekannter Service Level: {code} (Erlaubt: {', '.join(valid_service_levels)})"
                 )
         
-        self.checks['service_level']['status'] = svc_ok
+        self._set_check('service_level', svc_ok)
+        self._progress('sepa', 7, 9)
         
         # 8. Betragslimits (SEPA Instant max 100.000 EUR)
         limit_ok = True
-        for pmt in tree.xpath('//pain:PmtInf', namespaces=self.ns):
+        for pmt in self._payment_infos(tree):
             svc = pmt.find('.//pain:SvcLvl/pain:Cd', self.ns)
             if svc is not None and svc.text == 'URGP':
                 # SEPA Instant (URGP) - Max 100.000 EUR
@@ -237,7 +605,19 @@ class BaseValidator:
                     except ValueError:
                         pass
         
-        self.checks['amount_limits']['status'] = limit_ok
+        self._set_check('amount_limits', limit_ok)
+        self._progress('sepa', 8, 9)
+        
+        # 9. Kontrollsummen je Sammler (NbOfTxs/CtrlSum im PmtInf)
+        sums_ok = True
+        for pmt in self._payment_infos(tree):
+            tx_count, amount_sum = self._sum_transactions(pmt)
+            pmt_id = pmt.findtext('pain:PmtInfId', '-', self.ns)
+            if not self._compare_control_values(pmt, tx_count, amount_sum, f"Sammler {pmt_id}"):
+                sums_ok = False
+        
+        self._set_check('control_sums', sums_ok)
+        self._progress('sepa', 9, 9)
     
     def _validate_iban_format(self, iban):
         """Validiert IBAN Format (vereinfacht)"""
@@ -294,7 +674,7 @@ class BaseValidator:
     def add_error(self, element, level, title, msg):
         line = element.sourceline if element is not None else 0
         tag = etree.QName(element).localname if element is not None else "Unbekannt"
-        self.errors.append({
+        self.add_finding({
             "line": line, 
             "tag": tag, 
             "level": level, 
@@ -302,8 +682,20 @@ class BaseValidator:
             "msg": msg
         })
     
+    def add_finding(self, finding):
+        """Nimmt ein Finding auf und reicht es an on_finding weiter"""
+        if self._scope is not None and self.delta_cache is not None:
+            # Für den Delta-Cache relativ zum Teilbaum merken
+            self._scope['findings'].append(dict(finding, line=finding['line'] - self._scope_line))
+        if finding['level'] in ['CRITICAL', 'ERROR']:
+            self.error_count += 1
+        if self.collect_errors:
+            self.errors.append(finding)
+        if self.on_finding is not None:
+            self.on_finding(finding)
+    
     def _translate_xsd_error(self, error):
-        msg = str(error.message).replace("{urn:iso:std:iso:20022:tech:xsd:pain.001.001.09}", "")
+        msg = re.sub(r"\{[^}]*\}", "", str(error.message))
         match = re.search(r"\}?([a-zA-Z0-9]+)['>]", msg)
         tag = match.group(1) if match else "Unbekannt"
         
@@ -1,8 +1,10 @@
 from .base_validator_enhanced import BaseValidator
 
 class CoBaValidator(BaseValidator):
-    def __init__(self, xsd_path):
-        super().__init__(xsd_path)
+    RULESET_VERSION = "2.10-coba.0"
+    
+    def __init__(self, xsd_path=None, registry=None):
+        super().__init__(xsd_path, registry)
         
         # Platzhalter für künftige Commerzbank-Regeln
         self.checks.update({
@@ -35,8 +37,8 @@ class CoBaValidator(BaseValidator):
         """Commerzbank-spezifische Geschäftsregeln - TODO"""
         
         # Markiere als "nicht durchgeführt" (grau) bis Regeln implementiert sind
-        self.checks['coba_placeholder1']['status'] = None
-        self.checks['coba_placeholder2']['status'] = None
+        self._set_check('coba_placeholder1', None)
+        self._set_check('coba_placeholder2', None)
         
         # TODO: Hier werden später die CoBa-Regeln implementiert
         pass
@@ -0,0 +1,47 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from lxml import etree
+
+
+def fingerprint(element):
+    """Inhalts-Hash eines Teilbaums (z.B. PmtInf) ohne nachfolgenden Text"""
+    return hashlib.sha1(etree.tostring(element, with_tail=False)).hexdigest()
+
+
+class DeltaCache:
+    """
+    LRU-Cache für Ergebnisse pro Teilbaum (Regel-Findings, extrahierte
+    Sammler). Wird eine korrigierte Datei erneut hochgeladen, werden nur
+    Sammler mit geändertem Fingerprint neu geprüft.
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
@@ -0,0 +1,420 @@
+import calendar
+import re
+import sys
+import threading
+from decimal import Decimal
+
+from lxml import etree
+
+XS = '{http://www.w3.org/2001/XMLSchema}'
+XSI = '{http://www.w3.org/2001/XMLSchema-instance}'
+
+# xsi-Attribute, die xmlschema bei einem fertig kompilierten Schema ignoriert
+IGNORED_XSI = {XSI + 'schemaLocation', XSI + 'noNamespaceSchemaLocation'}
+
+# Ergebnis des Schnelltests
+OK = 'ok'                # Datei erfüllt Struktur und Facetten
+PROBLEM = 'problem'      # mindestens eine Abweichung gefunden
+UNSUPPORTED = 'unsupported'  # Konstrukt, das nur xmlschema sicher prüfen kann
+
+# Nur diese Zeichen dürfen in einem übernommenen pattern vorkommen - alles
+# andere (\d, \p{..}, ., ^, $ ...) verhält sich in XSD und Python verschieden
+_SAFE_PATTERN = re.compile(r'^(?:[A-Za-z0-9\[\]{}(),|?*+ -]|\\[-+.()\[\]{}|?*])*$')
+
+# re.ASCII: \d darf nur 0-9 treffen - Decimal()/int() akzeptieren auch
+# andere Unicode-Ziffern, die XSD ablehnt
+_DECIMAL = re.compile(r'^[+-]?(?:\d+(?:\.\d*)?|\.\d+)$', re.ASCII)
+_DATE = re.compile(r'^(\d{4})-(\d{2})-(\d{2})(Z|[+-]\d{2}:\d{2})?$', re.ASCII)
+_DATETIME = re.compile(r'^(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.\d+)?(Z|[+-]\d{2}:\d{2})?$', re.ASCII)
+# whiteSpace collapse kennt nur #x20, #x9, #xA, #xD (str.split() trennt auch an NBSP)
+_XSD_SPACE = re.compile(r'[ \t\n\r]+')
+_BOOLEAN = {'true', 'false', '1', '0'}
+
+# Basistypen, deren Lexik hier nachgebildet ist (whiteSpace: string=preserve,
+# alle anderen collapse)
+BUILTIN_TYPES = {'string', 'decimal', 'date', 'dateTime', 'boolean'}
+
+
+class Unsupported(Exception):
+    """Schema-Konstrukt, das der Schnelltest nicht abbildet"""
+
+
+class SimpleRule:
+    """Basistyp und Facetten eines simpleType (maxLength, pattern, enumeration ...)"""
+
+    def __init__(self, base):
+        self.base = base
+        self.min_length = None
+        self.max_length = None
+        self.patterns = []
+        self.enumeration = None
+        self.total_digits = None
+        self.fraction_digits = None
+        self.min_inclusive = None
+
+    def check(self, value):
+        if self.base != 'string':
+            value = _XSD_SPACE.sub(' ', value).strip(' ')
+
+        if self.base == 'decimal':
+            if not _DECIMAL.match(value):
+                return False
+            number = Decimal(value)
+            digits = value.lstrip('+-')
+            integer, _, fraction = digits.partition('.')
+            integer, fraction = integer.lstrip('0'), fraction.rstrip('0')
+            if self.total_digits is not None and len(integer) + len(fraction) > self.total_digits:
+                return False
+            if self.fraction_digits is not None and len(fraction) > self.fraction_digits:
+                return False
+            if self.min_inclusive is not None and number < self.min_inclusive:
+                return False
+        elif self.base == 'boolean':
+            if value not in _BOOLEAN:
+                return False
+        elif self.base == 'date':
+            match = _DATE.match(value)
+            if not match or not _valid_date(*match.groups()[:3]) or not _valid_tz(match.group(4)):
+                return False
+        elif self.base == 'dateTime':
+            match = _DATETIME.match(value)
+            if not match or not _valid_date(*match.groups()[:3]) or not _valid_tz(match.group(7)):
+                return False
+            hour, minute, second = (int(g) for g in match.groups()[3:6])
+            if hour > 23 or minute > 59 or second > 59:
+                return False
+
+        if self.min_length is not None and len(value) < self.min_length:
+            return False
+        if self.max_length is not None and len(value) > self.max_length:
+            return False
+        if self.enumeration is not None and value not in self.enumeration:
+            return False
+        if self.patterns and not any(p.fullmatch(value) for p in self.patterns):
+            return False
+        return True
+
+
+def _valid_date(year, month, day):
+    year, month, day = int(year), int(month), int(day)
+    if year == 0 or not 1 <= month <= 12:
+        return False
+    return 1 <= day <= calendar.monthrange(year, month)[1]
+
+
+def _valid_tz(tz):
+    if tz is None or tz == 'Z':
+        return True
+    hours, minutes = int(tz[1:3]), int(tz[4:6])
+    return minutes <= 59 and (hours < 14 or (hours == 14 and minutes == 0))
+
+
+class ComplexRule:
+    """
+    Inhaltsmodell eines complexType: flache sequence/choice aus Elementen
+    (name, type, min, max) oder simpleContent mit Attributen.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.kind = 'sequence'      # 'sequence', 'choice' oder 'simple'
+        self.particles = []
+        self.simple = None          # Typname bei simpleContent
+        self.attributes = {}        # Attribut -> (Typname, required)
+        self.unsupported = None     # Grund, falls nur xmlschema prüfen kann
+
+
+class FastSchema:
+    """
+    Aus der XSD abgeleiteter Struktur- und Facettenprüfer für pain.001.
+
+    Die Tabellen werden einmal pro XSD-Datei aus dem Schema erzeugt. check()
+    läuft in einem Durchgang über den bereits geparsten Baum und liefert OK,
+    PROBLEM oder UNSUPPORTED. Nur OK ist eine Aussage - in den anderen
+    Fällen muss der Aufrufer die vollständige xmlschema-Prüfung laufen
+    lassen, die dann auch die Fehlermeldungen liefert.
+    """
+
+    def __init__(self, xsd_path):
+        self.xsd_path = xsd_path
+        xsd = etree.parse(xsd_path).getroot()
+        self.namespace = xsd.get('targetNamespace')
+        if xsd.get('elementFormDefault') != 'qualified':
+            raise Unsupported("elementFormDefault != qualified")
+
+        self.simple_types = {}
+        self.complex_types = {}
+        self.roots = {}
+        definitions = {}
+        for node in xsd:
+            if node.tag in (XS + 'simpleType', XS + 'complexType'):
+                definitions[node.get('name')] = node
+            elif node.tag == XS + 'element':
+                self.roots[self._qname(node.get('name'))] = node.get('type')
+
+        for name, node in definitions.items():
+            if node.tag == XS + 'simpleType':
+                try:
+                    self._compile_simple(name, node, definitions)
+                except Unsupported:
+                    # Typ bleibt unbekannt - Elemente dieses Typs (und
+                    # complexTypes, die darauf aufbauen) melden UNSUPPORTED
+                    pass
+        for name, node in definitions.items():
+            if node.tag == XS + 'complexType':
+                self.complex_types[name] = self._compile_complex(name, node)
+
+    def _qname(self, local):
+        return f'{{{self.namespace}}}{local}'
+
+    def _type_name(self, ref):
+        prefix, _, local = ref.rpartition(':')
+        if prefix == 'xs':
+            return 'xs:' + local
+        return local
+
+    def _compile_simple(self, name, node, definitions):
+        if name in self.simple_types:
+            return self.simple_types[name]
+        restriction = node.find(XS + 'restriction')
+        if restriction is None or len(node) != 1:
+            raise Unsupported(f"simpleType {name}: nur restriction unterstützt")
+
+        base = self._type_name(restriction.get('base'))
+        if base.startswith('xs:'):
+            if base[3:] not in BUILTIN_TYPES:
+                raise Unsupported(f"simpleType {name}: Basistyp {base}")
+            rule = SimpleRule(base[3:])
+        else:
+            # Ableitung von einem eigenen simpleType: Facetten übernehmen
+            parent = self._compile_simple(base, definitions[base], definitions)
+            rule = SimpleRule(parent.base)
+            rule.__dict__.update({k: v for k, v in parent.__dict__.items() if k != 'patterns'})
+            if parent.patterns:
+                raise Unsupported(f"simpleType {name}: pattern über mehrere Stufen")
+
+        for facet in restriction:
+            if not isinstance(facet.tag, str):
+                continue
+            tag, value = facet.tag[len(XS):], facet.get('value')
+            if tag == 'maxLength':
+                rule.max_length = int(value)
+            elif tag == 'minLength':
+                rule.min_length = int(value)
+            elif tag == 'pattern':
+                if not _SAFE_PATTERN.match(value):
+                    raise Unsupported(f"simpleType {name}: pattern {value}")
+                rule.patterns.append(re.compile(value))
+            elif tag == 'enumeration':
+                rule.enumeration = (rule.enumeration or set()) | {value}
+            elif tag == 'totalDigits':
+                rule.total_digits = int(value)
+            elif tag == 'fractionDigits':
+                rule.fraction_digits = int(value)
+            elif tag == 'minInclusive':
+                rule.min_inclusive = Decimal(value)
+            else:
+                raise Unsupported(f"simpleType {name}: Facette {tag}")
+
+        if rule.base != 'string' and (rule.max_length is not None or rule.min_length is not None):
+            raise Unsupported(f"simpleType {name}: Länge auf {rule.base}")
+        if rule.base != 'decimal' and (rule.total_digits is not None or rule.fraction_digits is not None
+                                       or rule.min_inclusive is not None):
+            raise Unsupported(f"simpleType {name}: Ziffern-Facetten auf {rule.base}")
+        self.simple_types[name] = rule
+        return rule
+
+    def _compile_complex(self, name, node):
+        rule = ComplexRule(name)
+        content = [c for c in node if isinstance(c.tag, str)]
+        try:
+            if node.get('mixed') in ('true', '1') or node.get('abstract'):
+                raise Unsupported("mixed/abstract")
+            if not content:
+                return rule
+            if len(content) != 1:
+                raise Unsupported("mehrere Inhaltsmodelle")
+
+            model = content[0]
+            if model.tag == XS + 'simpleContent':
+                extension = model.find(XS + 'extension')
+                if extension is None:
+                    raise Unsupported("simpleContent ohne extension")
+                rule.kind = 'simple'
+                rule.simple = self._type_name(extension.get('base'))
+                if rule.simple not in self.simple_types:
+                    raise Unsupported(f"simpleContent-Basis {rule.simple}")
+                for attr in extension:
+                    if not isinstance(attr.tag, str):
+                        continue
+                    attr_type = self._type_name(attr.get('type') or '')
+                    if attr.tag != XS + 'attribute' or attr_type not in self.simple_types:
+                        raise Unsupported(f"Attribut {attr.get('name')}")
+                    rule.attributes[attr.get('name')] = (attr_type, attr.get('use') == 'required')
+                return rule
+
+            inner = [c for c in model if isinstance(c.tag, str)]
+            if (model.tag == XS + 'sequence' and len(inner) == 1 and inner[0].tag == XS + 'choice'
+                    and model.get('minOccurs') is None and model.get('maxOccurs') is None):
+                # pain.001.001.03: <sequence><choice>..</choice></sequence> ist eine reine choice
+                model = inner[0]
+            if model.tag not in (XS + 'sequence', XS + 'choice'):
+                raise Unsupported(model.tag)
+            if model.get('minOccurs') is not None or model.get('maxOccurs') is not None:
+                raise Unsupported("Occurs an sequence/choice")
+            rule.kind = 'sequence' if model.tag == XS + 'sequence' else 'choice'
+            for particle in model:
+                if not isinstance(particle.tag, str):
+                    continue
+                if particle.tag != XS + 'element' or particle.get('ref'):
+                    raise Unsupported(particle.tag[len(XS):])
+                max_occurs = particle.get('maxOccurs', '1')
+                rule.particles.append((
+                    self._qname(particle.get('name')),
+                    self._type_name(particle.get('type')),
+                    int(particle.get('minOccurs', '1')),
+                    None if max_occurs == 'unbounded' else int(max_occurs),
+                ))
+            names = [p[0] for p in rule.particles]
+            if len(names) != len(set(names)):
+                raise Unsupported("Element mehrfach im Inhaltsmodell")
+        except Unsupported as e:
+            rule.unsupported = str(e)
+        return rule
+
+    def check(self, root):
+        """Prüft den Baum; OK, PROBLEM oder UNSUPPORTED (siehe Klassendoku)"""
+        type_name = self.roots.get(root.tag)
+        if type_name is None:
+            return PROBLEM
+        stack = [(root, type_name)]
+        while stack:
+            elem, type_name = stack.pop()
+            result = self._check_element(elem, type_name, stack)
+            if result is not OK:
+                return result
+        return OK
+
+    def _check_element(self, elem, type_name, stack):
+        for attr in elem.attrib:
+            if attr.startswith(XSI) and attr not in IGNORED_XSI:
+                return UNSUPPORTED  # xsi:type / xsi:nil ändern die Bedeutung
+
+        simple = self.simple_types.get(type_name)
+        if simple is not None:
+            if len(elem) or any(a not in IGNORED_XSI for a in elem.attrib):
+                return PROBLEM
+            return OK if simple.check(elem.text or '') else PROBLEM
+
+        rule = self.complex_types.get(type_name)
+        if rule is None:
+            return UNSUPPORTED
+        if rule.unsupported:
+            return UNSUPPORTED
+
+        if rule.kind == 'simple':
+            if len(elem):
+                return PROBLEM
+            for attr in elem.attrib:
+                if attr not in rule.attributes and attr not in IGNORED_XSI:
+                    return PROBLEM
+            for attr, (attr_type, required) in rule.attributes.items():
+                value = elem.get(attr)
+                if value is None:
+                    if required:
+                        return PROBLEM
+                elif not self.simple_types[attr_type].check(value):
+                    return PROBLEM
+            return OK if self.simple_types[rule.simple].check(elem.text or '') else PROBLEM
+
+        # Element-Inhalt: kein Text, keine fremden Attribute
+        if any(a not in IGNORED_XSI for a in elem.attrib):
+            return PROBLEM
+        if elem.text and elem.text.strip():
+            return PROBLEM
+        children = []
+        for child in elem:
+            if child.tail and child.tail.strip():
+                return PROBLEM
+            if isinstance(child.tag, str):
+                children.append(child)
+
+        if rule.kind == 'sequence':
+            pos = 0
+            for name, child_type, min_occurs, max_occurs in rule.particles:
+                count = 0
+                while pos < len(children) and children[pos].tag == name and (max_occurs is None or count < max_occurs):
+                    stack.append((children[pos], child_type))
+                    pos += 1
+                    count += 1
+                if count < min_occurs:
+                    return PROBLEM
+            return OK if pos == len(children) else PROBLEM
+
+        # choice: genau eine Alternative
+        if not children:
+            return OK if any(p[2] == 0 for p in rule.particles) else PROBLEM
+        for name, child_type, min_occurs, max_occurs in rule.particles:
+            if children[0].tag == name:
+                if any(c.tag != name for c in children):
+                    return PROBLEM
+                if len(children) < min_occurs or (max_occurs is not None and len(children) > max_occurs):
+                    return PROBLEM
+                stack.extend((c, child_type) for c in children)
+                return OK
+        return PROBLEM
+
+
+_FAST_CACHE = {}
+_FAST_LOCK = threading.Lock()
+
+
+def get_fast_schema(xsd_path):
+    """
+    FastSchema für xsd_path (einmal pro Prozess erzeugt). None, wenn die XSD
+    Konstrukte enthält, die der Schnelltest gar nicht abbilden kann.
+    """
+    if xsd_path not in _FAST_CACHE:
+        with _FAST_LOCK:
+            if xsd_path not in _FAST_CACHE:
+                try:
+                    _FAST_CACHE[xsd_path] = FastSchema(xsd_path)
+                except Unsupported:
+                    _FAST_CACHE[xsd_path] = None
+    return _FAST_CACHE[xsd_path]
+
+
+def fast_check(xsd_path, tree):
+    """Schnelltest für einen geparsten Baum; OK, PROBLEM oder UNSUPPORTED"""
+    fast = get_fast_schema(xsd_path)
+    return fast.check(tree) if fast is not None else UNSUPPORTED
+
+
+def compare(xsd_path, xml_files):
+    """
+    Vergleicht Schnelltest und vollständige xmlschema-Prüfung für Dateien.
+    Gibt die Dateien zurück, bei denen der Schnelltest OK meldet, xmlschema
+    aber Fehler findet (darf nie vorkommen).
+    """
+    from .schema_registry import get_schema
+
+    schema = get_schema(xsd_path)
+    mismatches = []
+    for path in xml_files:
+        tree = etree.parse(path, etree.XMLParser(remove_blank_text=True)).getroot()
+        result = fast_check(xsd_path, tree)
+        full_ok = next(iter(schema.iter_errors(tree)), None) is None
+        print(f"{result:12} {'gültig' if full_ok else 'ungültig':9} {path}")
+        if result == OK and not full_ok:
+            mismatches.append(path)
+        elif result == PROBLEM and full_ok:
+            print(f"  Hinweis: Schnelltest zu streng, Fallback auf xmlschema ({path})")
+    return mismatches
+
+
+if __name__ == '__main__':
+    # Aufruf: python -m validators.fast_xsd schemas/pain.001.001.09.xsd datei1.xml ...
+    if len(sys.argv) < 3:
+        print("Aufruf: python -m validators.fast_xsd <xsd> <xml> [<xml> ...]")
+        sys.exit(2)
+    sys.exit(1 if compare(sys.argv[1], sys.argv[2:]) else 0)
@@ -2,8 +2,10 @@ from .base_validator_enhanced import BaseValidator
 import re
 
 class HVBValidator(BaseValidator):
-    def __init__(self, xsd_path):
-        super().__init__(xsd_path)
+    RULESET_VERSION = "2.10-hvb.1"
+    
+    def __init__(self, xsd_path=None, registry=None):
+        super().__init__(xsd_path, registry)
         
         # Erweitere Checks um HVB-spezifische Prüfungen
         self.checks.update({
@@ -52,7 +54,7 @@ Basierend auf **"ZV-Formate-DE.pdf"** (Stand 2025)
         
         # 1. Slashes in Referenzen
         slash_ok = True
-        for xpath in ['//pain:MsgId', '//pain:PmtInfId', '//pain:EndToEndId']:
+        for xpath in ['.//pain:MsgId', './/pain:PmtInfId', './/pain:EndToEndId']:
             for elem in tree.xpath(xpath, namespaces=self.ns):
                 if elem.text and re.search(r'^/|/$|//', elem.text):
                     slash_ok = False
@@ -63,11 +65,13 @@ Basierend auf **"ZV-Formate-DE.pdf"** (Stand 2025)
                         f"'{elem.text}' enthält unerlaubte Slashes (Anfang/Ende oder doppelt)"
                     )
         
-        self.checks['hvb_no_slashes']['status'] = slash_ok
+        self._set_check('hvb_no_slashes', slash_ok)
+        self._progress('bank', 1, 3)
         
-        # 2. URGP (SEPA Instant) benötigt UETR
-        urgp_ok = True
-        for pmt in tree.xpath('//pain:PmtInf', namespaces=self.ns):
+        # 2. URGP (SEPA Instant) benötigt UETR (UETR gibt es erst ab pain.001.001.09)
+        urgp_ok = True if self.fields['uetr'] else None
+        pmts = self._payment_infos(tree) if self.fields['uetr'] else []
+        for pmt in pmts:
             svc = pmt.find('.//pain:SvcLvl/pain:Cd', self.ns)
             if svc is not None and svc.text == 'URGP':
                 for tx in pmt.findall('.//pain:CdtTrfTxInf', self.ns):
@@ -81,11 +85,12 @@ Basierend auf **"ZV-Formate-DE.pdf"** (Stand 2025)
                             "Eilzahlung (URGP) ohne UETR - Tracking eingeschränkt"
                         )
         
-        self.checks['hvb_urgp_uetr']['status'] = urgp_ok
+        self._set_check('hvb_urgp_uetr', urgp_ok)
+        self._progress('bank', 2, 3)
         
         # 3. Adressformat (Warnung bei unstrukturiert)
         addr_ok = True
-        adr_lines = tree.xpath('//pain:AdrLine', namespaces=self.ns)
+        adr_lines = tree.xpath('.//pain:AdrLine', namespaces=self.ns)
         if adr_lines:
             addr_ok = False  # Nicht kritisch, nur Warnung
             for adr in adr_lines:
@@ -96,4 +101,5 @@ Basierend auf **"ZV-Formate-DE.pdf"** (Stand 2025)
                     "Unstrukturierte Adresse (AdrLine) - Strukturierte Adresse bevorzugt"
                 )
         
-        self.checks['hvb_address_format']['status'] = addr_ok if not adr_lines else None
+        self._set_check('hvb_address_format', addr_ok if not adr_lines else None)
+        self._progress('bank', 3, 3)
@@ -0,0 +1,151 @@
+import glob
+import os
+import re
+import threading
+
+NAMESPACE_PREFIX = 'urn:iso:std:iso:20022:tech:xsd:'
+DEFAULT_MESSAGE = 'pain.001.001.09'
+DEFAULT_SCHEMA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'schemas')
+
+# Namespace wird nur in den ersten Bytes gesucht (kein vollständiges Parsen)
+SNIFF_BYTES = 4096
+_NS_PATTERN = re.compile(rb'xmlns(?::[\w.-]+)?\s*=\s*["\'](urn:iso:std:iso:20022:tech:xsd:[\w.]+)["\']')
+_TARGET_NS_PATTERN = re.compile(rb'targetNamespace\s*=\s*["\']([^"\']+)["\']')
+
+# Versionsabhängige Elementnamen, die von den Regeln benutzt werden
+DEFAULT_FIELDS = {'bic': 'BICFI', 'uetr': 'UETR'}
+FIELD_OVERRIDES = {
+    'pain.001.001.03': {'bic': 'BIC', 'uetr': None},
+}
+
+# Kompilierte Schemas werden prozessweit geteilt (Kompilierung ist teuer,
+# Validierung gegen ein fertiges Schema ist thread-safe)
+_SCHEMA_CACHE = {}
+_SCHEMA_LOCK = threading.Lock()
+
+
+def get_schema(xsd_path):
+    """Gibt das kompilierte Schema für xsd_path zurück (einmalig kompiliert)"""
+    schema = _SCHEMA_CACHE.get(xsd_path)
+    if schema is None:
+        with _SCHEMA_LOCK:
+            schema = _SCHEMA_CACHE.get(xsd_path)
+            if schema is None:
+                # xmlschema erst bei Bedarf laden (spart Import-Zeit beim Start)
+                import xmlschema
+                schema = xmlschema.XMLSchema(xsd_path)
+                _SCHEMA_CACHE[xsd_path] = schema
+    return schema
+
+
+def warm_up(xsd_path, background=False):
+    """
+    Kompiliert das Schema vorab, damit die erste Validierung nicht darauf
+    warten muss. Mit background=True läuft das in einem Daemon-Thread;
+    ein paralleler validate()-Aufruf wartet dann einfach auf den Lock.
+    """
+    if background:
+        thread = threading.Thread(target=get_schema, args=(xsd_path,), daemon=True)
+        thread.start()
+        return thread
+    return get_schema(xsd_path)
+
+
+def sniff_namespace(head):
+    """Liest den ISO-20022-Namespace aus den ersten Bytes einer Datei"""
+    match = _NS_PATTERN.search(head[:SNIFF_BYTES])
+    return match.group(1).decode('ascii') if match else None
+
+
+class PrefixedStream:
+    """Stream, dessen bereits gelesener Anfang (head) wieder vorangestellt wird"""
+
+    def __init__(self, head, stream):
+        self.head = head
+        self.stream = stream
+
+    def read(self, size=-1):
+        if not self.head:
+            return self.stream.read(size)
+        if size is None or size < 0:
+            data, self.head = self.head + self.stream.read(), b''
+            return data
+        data, self.head = self.head[:size], self.head[size:]
+        if len(data) < size:
+            data += self.stream.read(size - len(data))
+        return data
+
+
+def peek_namespace(xml_content):
+    """
+    Ermittelt den Namespace von Bytes oder einem Stream. Gibt
+    (namespace, content) zurück; bei Streams ist content ein Stream, der den
+    bereits gelesenen Anfang wieder enthält.
+    """
+    if hasattr(xml_content, 'read'):
+        head = xml_content.read(SNIFF_BYTES)
+        return sniff_namespace(head), PrefixedStream(head, xml_content)
+    return sniff_namespace(xml_content), xml_content
+
+
+class SchemaInfo:
+    """Eine Nachrichtenversion: Namespace, XSD-Datei und Elementnamen"""
+
+    def __init__(self, namespace, xsd_path):
+        self.namespace = namespace
+        self.xsd_path = xsd_path
+        self.message = namespace[len(NAMESPACE_PREFIX):] if namespace.startswith(NAMESPACE_PREFIX) else namespace
+        self.ns = {'pain': namespace}
+        self.fields = dict(DEFAULT_FIELDS)
+        self.fields.update(FIELD_OVERRIDES.get(self.message, {}))
+
+    @property
+    def schema(self):
+        """Kompiliertes Schema - wird erst beim ersten Zugriff erzeugt"""
+        return get_schema(self.xsd_path)
+
+
+class SchemaRegistry:
+    """
+    Verzeichnis der unterstützten Nachrichtenversionen. Alle *.xsd im
+    Schema-Ordner werden anhand ihres targetNamespace registriert; kompiliert
+    wird jedes Schema erst, wenn die erste Datei dieser Version kommt.
+    """
+
+    def __init__(self, schema_dir=DEFAULT_SCHEMA_DIR):
+        self.schemas = {}
+        for xsd_path in sorted(glob.glob(os.path.join(schema_dir, '*.xsd'))):
+            with open(xsd_path, 'rb') as f:
+                match = _TARGET_NS_PATTERN.search(f.read(SNIFF_BYTES))
+            if match:
+                self.register(match.group(1).decode('ascii'), xsd_path)
+
+    def register(self, namespace, xsd_path):
+        self.schemas[namespace] = SchemaInfo(namespace, xsd_path)
+        return self.schemas[namespace]
+
+    def get(self, namespace):
+        return self.schemas.get(namespace)
+
+    @property
+    def default(self):
+        return self.schemas.get(NAMESPACE_PREFIX + DEFAULT_MESSAGE)
+
+    def messages(self):
+        """Unterstützte Versionen, z.B. ['pain.001.001.09']"""
+        return sorted(info.message for info in self.schemas.values())
+
+    def fields_for(self, namespace):
+        info = self.get(namespace)
+        return info.fields if info else dict(DEFAULT_FIELDS)
+
+
+_default_registry = None
+
+
+def default_registry():
+    """Registry über den schemas/-Ordner des Projekts (einmal pro Prozess)"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = SchemaRegistry()
+    return _default_registry
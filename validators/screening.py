@@ -0,0 +1,139 @@
+import hashlib
+import os
+import threading
+import unicodedata
+
+# Sperrliste: eine Zeile pro Eintrag "Name" oder "Name;Referenz", '#' = Kommentar
+DEFAULT_WATCHLIST_PATH = os.environ.get(
+    "ISO_VALIDATOR_WATCHLIST",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "watchlist.txt")
+)
+
+# Umschrift vor dem Entfernen der Akzente (ä -> AE statt A)
+TRANSLITERATION = str.maketrans({
+    'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'Ä': 'AE', 'Ö': 'OE', 'Ü': 'UE',
+    'ß': 'ss', 'ẞ': 'SS', 'æ': 'ae', 'Æ': 'AE', 'ø': 'oe', 'Ø': 'OE',
+    'œ': 'oe', 'Œ': 'OE', 'ł': 'l', 'Ł': 'L', 'đ': 'd', 'Đ': 'D', 'þ': 'th', 'Þ': 'TH',
+})
+
+# Bindewörter zählen nicht ("Müller & Söhne" = "Müller und Söhne" = "Müller Söhne")
+NOISE_TOKENS = frozenset({'AND', 'UND', 'ET', 'Y'})
+
+# Für reine ASCII-Namen reicht ein translate(): Satzzeichen werden Trenner
+_ASCII_TABLE = dict(TRANSLITERATION)
+_ASCII_TABLE.update({i: ' ' for i in range(128) if not chr(i).isalnum() and i not in _ASCII_TABLE})
+
+# Markiert das Ende eines Eintrags im Trie (kein gültiges Token)
+_END = ''
+
+
+def normalize_tokens(name):
+    """
+    Zerlegt einen Namen in vergleichbare Tokens: Umschrift, Akzente weg,
+    Großschreibung, alles außer Buchstaben/Ziffern trennt, Bindewörter
+    entfallen.
+    """
+    name = name or ''
+    if name.isascii():
+        tokens = name.translate(_ASCII_TABLE).upper().split()
+    else:
+        text = unicodedata.normalize('NFKD', name.translate(TRANSLITERATION))
+        chars = []
+        for c in text:
+            if c.isalnum():
+                if not unicodedata.combining(c):
+                    chars.append(c.upper())
+            elif not unicodedata.combining(c):
+                chars.append(' ')
+        tokens = ''.join(chars).split()
+    return tuple(t for t in tokens if t not in NOISE_TOKENS)
+
+
+class Watchlist:
+    """
+    Sperrliste als Token-Trie. Ein Eintrag trifft, wenn seine Tokens als
+    zusammenhängende Folge im Empfängernamen vorkommen ("Muster AG" trifft
+    "Max Muster AG Berlin"). Pro Name kostet die Suche nur
+    Anzahl Tokens x Tiefe des Tries - unabhängig von der Listengröße.
+    """
+
+    def __init__(self, entries, source=None):
+        self.source = source
+        self.trie = {}
+        self.count = 0
+        digest = hashlib.sha1()
+        for name, reference in entries:
+            tokens = normalize_tokens(name)
+            if not tokens:
+                continue
+            node = self.trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node.setdefault(_END, []).append((name, reference))
+            digest.update(f"{' '.join(tokens)};{reference or ''}\n".encode('utf-8'))
+            self.count += 1
+        self.fingerprint = digest.hexdigest()
+        self._memo = {}
+
+    @classmethod
+    def from_file(cls, path):
+        entries = []
+        with open(path, encoding='utf-8-sig') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                name, _, reference = line.partition(';')
+                entries.append((name.strip(), reference.strip() or None))
+        return cls(entries, source=path)
+
+    def __len__(self):
+        return self.count
+
+    def match(self, name):
+        """Alle Einträge (name, referenz), die im Namen vorkommen"""
+        tokens = normalize_tokens(name)
+        hits = self._memo.get(tokens)
+        if hits is None:
+            hits = []
+            for start in range(len(tokens)):
+                node = self.trie
+                for token in tokens[start:]:
+                    node = node.get(token)
+                    if node is None:
+                        break
+                    if _END in node:
+                        hits.extend(e for e in node[_END] if e not in hits)
+            if len(self._memo) < 100000:
+                self._memo[tokens] = hits
+        return hits
+
+    def screen(self, names):
+        """Ein Durchlauf über alle Namen; liefert (index, name, treffer)"""
+        for i, name in enumerate(names):
+            hits = self.match(name)
+            if hits:
+                yield i, name, hits
+
+
+_WATCHLIST_CACHE = {}
+_WATCHLIST_LOCK = threading.Lock()
+
+
+def get_watchlist(path=DEFAULT_WATCHLIST_PATH):
+    """
+    Sperrliste aus path (einmal pro Prozess und Dateistand geladen).
+    None, wenn keine Liste vorhanden ist - die Prüfung entfällt dann.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _WATCHLIST_LOCK:
+        watchlist = _WATCHLIST_CACHE.get(key)
+        if watchlist is None:
+            watchlist = Watchlist.from_file(path)
+            _WATCHLIST_CACHE.clear()
+            _WATCHLIST_CACHE[key] = watchlist
+    return watchlist
@@ -0,0 +1,394 @@
+"""
+Überwacht einen Eingangsordner und validiert neue Zahlungsdateien automatisch.
+
+Neue oder fertig geschriebene Dateien (*.xml, *.zip, *.gz) werden unter Linux
+über inotify erkannt, sonst per Polling. Eine Datei wird erst geprüft, wenn
+sie für --debounce Sekunden unverändert ist (halb geschriebene Exporte).
+Die Validierung läuft in einem Pool von Worker-Prozessen mit vorab
+geladenem Validator und kompiliertem Schema - pro Datei fällt kein
+Startaufwand an. Der Report landet neben der Datei oder in --results; die
+Findings werden dabei direkt in den Report geschrieben (konstanter
+Speicherbedarf). Mit --history kommt das Ergebnis zusätzlich in den Verlauf
+der App - dafür bleiben die Findings einer Datei im Speicher.
+
+Aufruf:  python watcher.py EINGANG [--bank hvb|coba] [--results ORDNER]
+                           [--format jsonl|csv|junit] [--workers N] [--history] [--once]
+"""
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import signal
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import history
+import reports
+from validators.archive import is_archive, list_members, open_member
+
+PROFILES = {
+    'hvb': ('HypoVereinsbank', 'validators.hvb_validator_enhanced', 'HVBValidator'),
+    'coba': ('Commerzbank', 'validators.coba_validator_enhanced', 'CoBaValidator'),
+}
+INPUT_EXTENSIONS = ('.xml', '.zip', '.gz')
+REPORT_MARKER = '.validation.'
+# Abstand in Sekunden für Aufräumarbeiten im Dauerbetrieb (processed, Verlauf)
+PRUNE_INTERVAL = 60.0
+
+# inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_input_file(name):
+    """Zahlungsdatei, die geprüft werden soll (keine eigenen Reports)"""
+    return name.lower().endswith(INPUT_EXTENSIONS) and REPORT_MARKER not in name and not name.startswith('.')
+
+
+def report_path(path, results_dir, fmt, member=None):
+    """Pfad des Reports: <datei>[.<member>].validation.<format>"""
+    name = os.path.basename(path)
+    if member is not None:
+        name += '.' + member.replace('/', '_').replace('\\', '_')
+    extension = 'junit.xml' if fmt == 'junit' else fmt
+    return os.path.join(results_dir or os.path.dirname(path), f"{name}{REPORT_MARKER}{extension}")
+
+
+# ---------- Worker-Prozess ----------
+
+_worker = {}
+
+
+def _init_worker(bank, use_history):
+    """Einmal pro Worker: Validator anlegen, Schema und Schnelltest vorbereiten"""
+    import importlib
+    from validators.fast_xsd import get_fast_schema
+    from validators.schema_registry import warm_up
+
+    # Strg+C und SIGTERM (gehen an die ganze Prozessgruppe) fängt nur der
+    # Hauptprozess ab - laufende Prüfungen laufen zu Ende. Der SIGTERM-Handler
+    # des Hauptprozesses wird sonst beim Fork geerbt.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    profile, module, cls = PROFILES[bank]
+    validator = getattr(importlib.import_module(module), cls)()
+    warm_up(validator.xsd_path)
+    get_fast_schema(validator.xsd_path)
+    _worker['profile'] = profile
+    _worker['validator'] = validator
+    _worker['history'] = history.HistoryStore() if use_history else None
+
+
+def _write_report(validator, target, fmt):
+    """Schreibt den Report atomar (erst .tmp, dann umbenennen)"""
+    tmp = target + '.tmp'
+    with open(tmp, 'wb') as fp:
+        reports.write_validation_report(fmt, fp, validator.checks, validator.errors)
+    os.replace(tmp, target)
+
+
+def _validate_one(validator, content, target, fmt, file_name, digest):
+    """
+    Validiert und schreibt die Findings dabei direkt in den Report. Die
+    Findings bleiben nur im Speicher, wenn sie in den Verlauf gehen.
+    """
+    keep_errors = _worker['history'] is not None and digest is not None
+    tmp = target + '.tmp'
+    started = time.perf_counter()
+    try:
+        with open(tmp, 'wb') as fp:
+            valid = reports.stream_validation_report(validator, content, fmt, fp, keep_errors=keep_errors)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, target)
+    duration_ms = (time.perf_counter() - started) * 1000
+    if keep_errors:
+        _worker['history'].save(
+            digest, file_name, _worker['profile'], validator.ruleset_version,
+            duration_ms, valid, {k: c['status'] for k, c in validator.checks.items()}, validator.errors
+        )
+    return {'valid': valid, 'errors': validator.error_count, 'report': target, 'duration_ms': duration_ms}
+
+
+def validate_path(path, results_dir, fmt):
+    """Validiert eine Datei (bzw. alle Member eines Archivs) im Worker"""
+    validator = _worker['validator']
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    if not is_archive(path):
+        result = _validate_one(validator, data, report_path(path, results_dir, fmt), fmt,
+                               os.path.basename(path), history.file_hash(data))
+        return dict(result, path=path)
+
+    # Archive: Member nacheinander mit demselben (warmen) Validator
+    results = []
+    for member in list_members(os.path.basename(path), data):
+        target = report_path(path, results_dir, fmt, member)
+        try:
+            with open_member(path, data, member) as stream:
+                results.append(_validate_one(validator, stream, target, fmt, member, None))
+        except Exception as e:
+            # Defektes Member - Zustand des letzten Laufs verwerfen
+            validator.errors = []
+            validator.error_count = 0
+            for check in validator.checks.values():
+                check['status'] = None
+            validator.checks['xml_wellformed']['status'] = False
+            validator.add_finding({
+                "line": 0,
+                "tag": "System",
+                "level": "CRITICAL",
+                "title": "Archiv Fehler",
+                "msg": f"Datei konnte nicht entpackt werden: {str(e)}"
+            })
+            _write_report(validator, target, fmt)
+            results.append({'valid': False, 'errors': validator.error_count, 'report': target, 'duration_ms': 0})
+    return {
+        'path': path,
+        'valid': all(r['valid'] for r in results),
+        'errors': sum(r['errors'] for r in results),
+        'report': ', '.join(os.path.basename(r['report']) for r in results) or '-',
+        'duration_ms': sum(r['duration_ms'] for r in results),
+    }
+
+
+# ---------- Dateierkennung ----------
+
+class InotifyWatch:
+    """Minimaler inotify-Zugriff über ctypes (nur Linux)"""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 fehlgeschlagen")
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch fehlgeschlagen")
+
+    def names(self, timeout):
+        """Dateinamen der Ereignisse innerhalb von timeout Sekunden"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names, offset = [], 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            _wd, _mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            names.append(os.fsdecode(buffer[offset:offset + length].rstrip(b'\0')))
+            offset += length
+        return [n for n in names if n]
+
+    def close(self):
+        os.close(self.fd)
+
+
+def scan(directory):
+    """Alle Eingangsdateien mit (Größe, mtime)"""
+    found = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and is_input_file(entry.name):
+                stat = entry.stat()
+                found[entry.path] = (stat.st_size, stat.st_mtime_ns)
+    return found
+
+
+def is_done(path, results_dir, fmt):
+    """Bereits geprüft: Report existiert und ist neuer als die Datei"""
+    target = report_path(path, results_dir, fmt)
+    if is_archive(path):
+        # Archive: mindestens ein Member-Report neuer als das Archiv
+        prefix = os.path.basename(path) + '.'
+        folder = os.path.dirname(target)
+        candidates = [os.path.join(folder, n) for n in os.listdir(folder)
+                      if n.startswith(prefix) and REPORT_MARKER in n]
+    else:
+        candidates = [target]
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        return any(os.stat(c).st_mtime_ns >= mtime for c in candidates if os.path.exists(c))
+    except OSError:
+        return False
+
+
+class Watcher:
+    """
+    Sammelt Kandidaten (aus inotify oder Polling), wartet die Ruhezeit ab
+    und gibt stabile Dateien an den Worker-Pool.
+    """
+
+    def __init__(self, directory, results_dir=None, fmt='jsonl', bank='hvb', workers=None,
+                 debounce=2.0, poll_interval=1.0, use_inotify=True, use_history=False):
+        self.directory = directory
+        self.results_dir = results_dir
+        self.fmt = fmt
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(bank, use_history))
+        self.pending = {}      # Pfad -> (Größe, mtime, zuletzt geändert)
+        self.running = {}      # Future -> Pfad
+        self.processed = {}    # Pfad -> (Größe, mtime) beim Einreichen
+        self.last_prune = time.monotonic()
+        self.history = history.HistoryStore() if use_history else None
+        self.inotify = None
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self.inotify = InotifyWatch(directory)
+            except (OSError, AttributeError) as e:
+                print(f"inotify nicht verfügbar ({e}) - Polling alle {poll_interval}s")
+
+    def _touch(self, path):
+        """Kandidat (neu) vormerken; jede Änderung startet die Ruhezeit neu"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.pending.pop(path, None)
+            return
+        signature = (stat.st_size, stat.st_mtime_ns)
+        if self.processed.get(path) == signature:
+            return
+        previous = self.pending.get(path)
+        if previous is None or previous[:2] != signature:
+            self.pending[path] = signature + (time.monotonic(),)
+
+    def _collect(self, timeout):
+        if self.inotify is not None:
+            for name in self.inotify.names(timeout):
+                if is_input_file(name):
+                    self._touch(os.path.join(self.directory, name))
+            # Laufende Schreibvorgänge erzeugen kein Ereignis - vorgemerkte
+            # Dateien trotzdem auf Änderungen prüfen
+            for path in list(self.pending):
+                self._touch(path)
+        else:
+            time.sleep(timeout)
+            for path in scan(self.directory):
+                self._touch(path)
+
+    def _submit_ready(self):
+        now = time.monotonic()
+        for path, (size, mtime, changed) in list(self.pending.items()):
+            if now - changed < self.debounce:
+                continue
+            del self.pending[path]
+            self.processed[path] = (size, mtime)
+            future = self.pool.submit(validate_path, path, self.results_dir, self.fmt)
+            self.running[future] = path
+
+    def _prune(self):
+        """
+        Dauerbetrieb: Einträge gelöschter/verschobener Dateien vergessen und
+        die Aufbewahrungsregeln des Verlaufs anwenden
+        """
+        now = time.monotonic()
+        if now - self.last_prune < PRUNE_INTERVAL:
+            return
+        self.last_prune = now
+        for path in [p for p in self.processed if not os.path.exists(p)]:
+            del self.processed[path]
+        if self.history is not None:
+            self.history.prune()
+
+    def _report_finished(self):
+        for future in [f for f in self.running if f.done()]:
+            path = self.running.pop(future)
+            try:
+                result = future.result()
+                status = "✅ gültig" if result['valid'] else f"❌ {result['errors']} Fehler"
+                print(f"{status:14} {os.path.basename(path)} ({result['duration_ms']:.0f} ms) -> {result['report']}",
+                      flush=True)
+            except Exception as e:
+                print(f"⚠️ {os.path.basename(path)}: {e}", flush=True)
+
+    def initial_scan(self):
+        """Beim Start vorhandene, noch nicht geprüfte Dateien einreihen"""
+        for path, signature in scan(self.directory).items():
+            if is_done(path, self.results_dir, self.fmt):
+                self.processed[path] = signature
+            else:
+                self._touch(path)
+
+    def run(self, once=False):
+        self.initial_scan()
+        if once:
+            # Vorhandene Dateien ohne Ruhezeit prüfen und beenden
+            self.debounce = 0
+            self._submit_ready()
+            self.pool.shutdown(wait=True)
+            self._report_finished()
+            return
+        try:
+            while True:
+                self._collect(self.poll_interval)
+                self._submit_ready()
+                self._report_finished()
+                self._prune()
+        except KeyboardInterrupt:
+            print("Beende ...")
+        finally:
+            self.close()
+
+    def close(self):
+        if self.inotify is not None:
+            self.inotify.close()
+            self.inotify = None
+        self.pool.shutdown(wait=True, cancel_futures=True)
+        self._report_finished()
+
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eingangsordner überwachen und Zahlungsdateien validieren")
+    parser.add_argument('directory', help="Eingangsordner")
+    parser.add_argument('--bank', choices=sorted(PROFILES), default='hvb')
+    parser.add_argument('--results', help="Ordner für Reports (Standard: neben der Datei)")
+    parser.add_argument('--format', choices=reports.FORMATS, default='jsonl')
+    parser.add_argument('--workers', type=int, default=None, help="Worker-Prozesse (Standard: CPU-Anzahl)")
+    parser.add_argument('--debounce', type=float, default=2.0, help="Ruhezeit in Sekunden vor der Prüfung")
+    parser.add_argument('--poll', type=float, default=1.0, help="Prüfintervall in Sekunden")
+    parser.add_argument('--no-inotify', action='store_true', help="Immer Polling verwenden")
+    parser.add_argument('--history', action='store_true',
+                        help="Ergebnisse zusätzlich im Verlauf der App speichern (Findings je Datei im Speicher)")
+    parser.add_argument('--once', action='store_true', help="Vorhandene Dateien prüfen und beenden")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"Kein Ordner: {args.directory}")
+    if args.results:
+        os.makedirs(args.results, exist_ok=True)
+
+    watcher = Watcher(
+        os.path.abspath(args.directory), results_dir=args.results, fmt=args.format, bank=args.bank,
+        workers=args.workers, debounce=args.debounce, poll_interval=args.poll,
+        use_inotify=not args.no_inotify, use_history=args.history
+    )
+    mode = "inotify" if watcher.inotify is not None else "Polling"
+    # SIGTERM (z.B. systemd stop) wie Strg+C behandeln
+    signal.signal(signal.SIGTERM, _stop)
+    print(f"Überwache {watcher.directory} ({PROFILES[args.bank][0]}, {mode}) - Strg+C beendet", flush=True)
+    watcher.run(once=args.once)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())